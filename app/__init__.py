@@ -8,24 +8,45 @@
 __version__ = "1.0.0"
 __author__ = "Astral AI"
 
-# Core application components
-from .main import app
-from .routers.url_router import router as url_router
-
-# Service layer
-from .services import UrlService, OnboardingUrlService, config_service
-
-# Models
-from .models import (
-    UrlInfo, 
-    DetectionMethod, 
-    OnboardingResult,
-    SiteConfig,
-    SiteStatus
-)
-
-# Utilities
-from .utils import JsonWriter
+import importlib
+
+# Public names resolved lazily on first access (PEP 562), so importing the
+# package does not pull in FastAPI, the SDK clients and every model up front
+_LAZY_IMPORTS = {
+    # Application
+    'app': ('app.main', 'app'),
+    'url_router': ('app.routers.url_router', 'router'),
+    
+    # Services
+    'UrlService': ('app.services.url_service', 'UrlService'),
+    'OnboardingUrlService': ('app.services.url_service', 'OnboardingUrlService'),
+    'config_service': ('app.services.config_service', 'config_service'),
+    
+    # Models
+    'UrlInfo': ('app.models.url_models', 'UrlInfo'),
+    'DetectionMethod': ('app.models.url_models', 'DetectionMethod'),
+    'OnboardingResult': ('app.models.url_models', 'OnboardingResult'),
+    'SiteConfig': ('app.models.config_models', 'SiteConfig'),
+    'SiteStatus': ('app.models.config_models', 'SiteStatus'),
+    
+    # Utilities
+    'JsonWriter': ('app.utils.json_writer', 'JsonWriter'),
+}
+
+
+def __getattr__(name: str):
+    """Import a public name on first access and cache it on the package."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module_name, attribute = _LAZY_IMPORTS[name]
+    value = getattr(importlib.import_module(module_name), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     # Application
@@ -5,9 +5,32 @@
 # Sections: Imports, Public exports
 # ==============================================================================
 
-from .config import AIConfig
+import importlib
+
+# these share their submodule's name, so they are bound eagerly; importing the
+# submodule later would otherwise replace the package attribute with the module
+from .hub_classifier import HubClassifier, hub_classifier
+from .prompt_cache import PromptCache, prompt_cache
+
+# heavier names are imported on first attribute access (PEP 562)
+_LAZY_IMPORTS = {
+    "AIConfig": ".config",
+}
+
+def __getattr__(name: str):
+    """Import a public name on first access and cache it on the package."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 # ==============================================================================
 # Public exports
 # ==============================================================================
-__all__ = ["AIConfig"]
+__all__ = ["AIConfig", "HubClassifier", "hub_classifier", "PromptCache", "prompt_cache"]
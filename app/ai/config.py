@@ -2,122 +2,258 @@
 # config.py — AI prompt configuration
 # ==============================================================================
 # Purpose: Configure AI prompts and models for URL analysis
-# Sections: Imports, Public API, Main Classes
+# Sections: Imports, Public API, Prompt Templates, Helper Functions, Main Classes
 # ==============================================================================
 
 # ==============================================================================
 # Imports
 # ==============================================================================
 
+# Standard Library -----
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from typing import List, Tuple
+from urllib.parse import urljoin, urlsplit
+
 # Astral AI ----
 from app.models.url_models import UrlAnalysisRequest, UrlJudgeRequest
 
+# Optional ----
+try:
+    import tiktoken
+except ImportError:  # exact token counts when installed, estimates otherwise
+    tiktoken = None
+
 # ==============================================================================
 # Public exports
 # ==============================================================================
 __all__ = ["AIConfig"]
 
+# ==============================================================================
+# Prompt Templates
+# ==============================================================================
+
+# prompt text lives in app/ai/prompts/ and is read once at import;
+# static instructions go first so OpenAI prefix caching matches across calls
+_PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+
+def _load_prompt(name: str, **substitutions: str) -> str:
+    """Read a prompt template and fill its $placeholders."""
+    text = (_PROMPTS_DIR / f"{name}.txt").read_text(encoding="utf-8")
+    return Template(text).substitute(substitutions) if substitutions else text
+
+
+_HUB_CRITERIA = _load_prompt("hub_criteria")
+_ANALYSIS_PREFIX = _load_prompt("analysis", hub_criteria=_HUB_CRITERIA)
+_JUDGE_PREFIX = _load_prompt("judge")
+
+# identifies the loaded prompt text; cached AI selections are keyed on it
+_PROMPT_VERSION = hashlib.sha256(f"{_ANALYSIS_PREFIX}\0{_JUDGE_PREFIX}".encode("utf-8")).hexdigest()[:16]
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+# default model for both AI stages, also used to pick the tokenizer
+_DEFAULT_MODEL = "gpt-4o-mini"
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding for model, or None when unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # unknown model name or the encoding file could not be fetched
+        return None
+
+
+def _estimate_tokens(text: str, model: str = _DEFAULT_MODEL) -> int:
+    """
+    Token count for text plus its line separator.
+
+    Uses the model's BPE encoding when tiktoken is installed, otherwise a
+    cheap estimate for ASCII-heavy text such as URLs (~3 chars/token).
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 3 + 2
+    return len(encoding.encode(text, disallowed_special=())) + 1
+
+
+def _split_common_origin(urls: List[str]) -> Tuple[str, List[str]]:
+    """
+    Split URLs sharing one scheme and host into (origin, paths).
+
+    Returns ("", urls) when the URLs span several origins or any URL has
+    no path to keep, so callers can always rejoin with urljoin(origin, path).
+    """
+    if not urls:
+        return "", urls
+
+    parts = urlsplit(urls[0])
+    origin = f"{parts.scheme}://{parts.netloc}"
+    origin_length = len(origin)
+
+    for url in urls:
+        if not url.startswith(origin) or not url.startswith("/", origin_length):
+            return "", urls
+
+    return origin, [url[origin_length:] for url in urls]
+
+
+@lru_cache(maxsize=128)
+def _render_analysis_header(site_name: str, url_count: int, origin: str = "") -> str:
+    """Render the site-specific header that precedes the URL list."""
+    if origin:
+        return (
+            f"\nSite: {site_name}\n"
+            f"Base URL: {origin}\n"
+            f"URL paths to analyze ({url_count}), relative to the base URL; return them as listed:\n"
+        )
+    return f"\nSite: {site_name}\nURLs to analyze ({url_count}):\n"
+
+
+@lru_cache(maxsize=128)
+def _render_judge_header(site_name: str, selection_count: int) -> str:
+    """Render the site-specific header that precedes the judge suggestions."""
+    return (
+        f"\nSite: {site_name}\n"
+        f"Return exactly {selection_count} URLs that are content discovery hubs, not individual articles.\n"
+        f"\nSuggestions:\n"
+    )
+
 # ==============================================================================
 # Main Classes
 # ==============================================================================
 
 class AIConfig:
     """Configuration for AI prompts and models."""
-    
+
     # Model configurations
     MODELS = {
-        "url_analysis": "gpt-4o-mini",
-        "url_judge": "gpt-4o-mini"
+        "url_analysis": _DEFAULT_MODEL,
+        "url_judge": _DEFAULT_MODEL
     }
-    
+
+    # Hash of the prompt templates in app/ai/prompts/, part of every prompt cache key
+    PROMPT_VERSION = _PROMPT_VERSION
+
+    # URL pre-filtering applied locally before any LLM call
+    STATIC_PAGE_PATTERN = re.compile(
+        r"/(?:about|contact|privacy|terms|cookies?|legal|sitemap|faq|login|signup)(?:[/?#-]|$)",
+        re.IGNORECASE
+    )
+    HUB_HINT_PATTERN = re.compile(
+        r"[/-](?:news|blog|press|articles|publications|updates|announcements|latest|recent|whats-new)(?:[/?#-]|$)",
+        re.IGNORECASE
+    )
+    MIN_HUB_CANDIDATES = 20
+
+    # Cap on URLs sent to the analysis stage after local hub ranking
+    MAX_ANALYSIS_URLS = 200
+
+    # Token budget for a single analysis request (gpt-4o-mini has a 128K context)
+    MAX_TOKENS_PER_REQUEST = 100_000
+
+    # Independent analyses per URL batch, and the cap on in-flight OpenAI calls
+    ANALYSES_PER_BATCH = 3
+    MAX_CONCURRENT_REQUESTS = 8
+
+    @staticmethod
+    def estimate_tokens(text: str, model: str = _DEFAULT_MODEL) -> int:
+        """Token count used for batching and rate limiting."""
+        return _estimate_tokens(text, model)
+
     @classmethod
-    def build_analysis_prompt(cls, request: UrlAnalysisRequest) -> str:
-        """Build the analysis prompt for URL evaluation."""
-        return f"""
-        Analyze the following URLs from {request.site_name} and identify the 5 URLs that are most likely to serve as content discovery hubs for new articles and pages.
-        
-        You want URLs that are:
-        - Content section pages (like /news/, /blog/, /press-releases/, /judgments/, /articles/)
-        - Archive or index pages where new content gets added
-        - Dynamic content aggregators (pages with terms like "latest", "recent", "updates", "announcements")
-        - Pages that serve as entry points to discover new content, even if they're subsections
-        - NOT individual article pages or static content pages
-        - NOT pages like "About Us", "Contact", "Privacy Policy", "Terms of Service"
-        
-        Good examples:
-        - /news/ (news section homepage)
-        - /blog/ (blog index page)
-        - /press-releases/ (press release archive)
-        - /judgments/ (judgment archive)
-        - /publications/ (publications index)
-        - /reports/ (reports archive)
-        - /latest-news/ (recent news aggregator)
-        - /council-updates/latest-news/ (subsection news aggregator)
-        - /announcements/ (announcement hub)
-        - /whats-new/ (new content showcase)
-        
-        Bad examples:
-        - /news/specific-article-title (individual article)
-        - /blog/2024/01/specific-post (individual blog post)
-        - /about-us (static page)
-        - /contact (static page)
-        - /privacy-policy (static page)
-        
-        Look for:
-        - Pages that aggregate multiple pieces of content
-        - URLs with dynamic content indicators (latest, recent, updates, news)
-        - Both main sections AND valuable subsections that serve as content discovery points
-        - Pages that would be bookmarked by users wanting to check for new content
-        
-        URLs to analyze: {request.urls}
-        
-        Return a JSON object with this exact structure:
-        {{
-            "urls": ["url1", "url2", "url3", "url4", "url5"],
-            "reasoning": "Explanation of why these URLs were selected as content discovery hubs"
-        }}
-        
-        Return exactly 5 URLs that are content discovery hubs, not individual articles.
+    def prefilter_urls(cls, urls: List[str]) -> List[str]:
         """
-    
-    @classmethod
-    def build_judge_prompt(cls, request: UrlJudgeRequest) -> str:
+        Drop static pages and keep hub-like URLs before LLM analysis.
+
+        Args:
+            urls: Raw URLs discovered for a site
+
+        Returns:
+            URLs worth sending to the model; falls back to all non-static
+            URLs when fewer than MIN_HUB_CANDIDATES carry a hub hint.
+        """
+        candidates = [url for url in urls if not cls.STATIC_PAGE_PATTERN.search(url)]
+        hub_candidates = [url for url in candidates if cls.HUB_HINT_PATTERN.search(url)]
+
+        if len(hub_candidates) >= cls.MIN_HUB_CANDIDATES:
+            return hub_candidates
+        return candidates
+
+    @staticmethod
+    def build_analysis_prompt(request: UrlAnalysisRequest) -> str:
+        """Build the analysis prompt for URL evaluation."""
+        # one shared origin is stated once instead of repeated on every URL
+        origin, paths = _split_common_origin(request.urls)
+        header = _render_analysis_header(request.site_name, len(request.urls), origin)
+        url_lines = "\n".join(paths)
+
+        return f"{_ANALYSIS_PREFIX}{header}{url_lines}\n"
+
+    @staticmethod
+    def expand_urls(request: UrlAnalysisRequest, urls: List[str]) -> List[str]:
+        """Turn URLs returned for an analysis prompt back into absolute URLs."""
+        origin, _ = _split_common_origin(request.urls)
+        if not origin:
+            return urls
+        return [urljoin(origin, url) for url in urls]
+
+    @staticmethod
+    def build_judge_prompt(request: UrlJudgeRequest) -> str:
         """Build the judge prompt for final URL selection."""
-        suggestions_text = "\n".join([
-            f"Analysis {i+1}: {urls}" 
-            for i, urls in enumerate(request.url_suggestions)
-        ])
-        
-        return f"""
-        Review the following URL suggestions from multiple AI analyses for {request.site_name}.
-        Select the {request.selection_count} URLs that are BEST content discovery hubs for finding new articles and pages.
-        
-        A good content discovery hub:
-        - Is a section/archive page (like /news/, /blog/, /press-releases/)
-        - Contains links to multiple articles or content pieces
-        - Gets updated when new content is published
-        - Serves as an entry point to discover new content
-        - May be a subsection that aggregates content (like /council-updates/latest-news/)
-        - Has dynamic content indicators in the URL or purpose
-        - Is NOT an individual article page
-        - Would be useful for users wanting to check for new content regularly
-        
-        When evaluating URLs, prioritize:
-        1. **Content density**: Pages that link to many articles
-        2. **Update frequency**: Pages that are likely updated regularly
-        3. **User discoverability**: How easily users can find new content
-        4. **Content aggregation**: Pages that serve as content showcases
-        5. **Hierarchical value**: Both main sections and valuable subsections
-        
-        Suggestions:
-        {suggestions_text}
-        
-        Return a JSON object with this exact structure:
-        {{
-            "urls": ["url1", "url2", "url3", "url4", "url5"],
-            "rejected_urls": ["rejected1", "rejected2"],
-            "reasoning": "Explanation of why these URLs are the best content discovery hubs"
-        }}
-        
-        Return exactly {request.selection_count} URLs that are content discovery hubs, not individual articles.
+        suggestions_text = "\n".join(
+            f"Analysis {i}: {urls}"
+            for i, urls in enumerate(request.url_suggestions, 1)
+        )
+        header = _render_judge_header(request.site_name, request.selection_count)
+
+        return f"{_JUDGE_PREFIX}{header}{suggestions_text}\n"
+
+    @classmethod
+    def pack_batches(cls, urls: List[str], prompt_overhead: int = None) -> List[List[str]]:
         """
+        Greedily pack URLs into batches that fit MAX_TOKENS_PER_REQUEST.
+
+        Args:
+            urls: URLs to analyze
+            prompt_overhead: Tokens reserved for the static prompt text
+
+        Returns:
+            List of URL batches, each within the per-request token budget
+
+        Example:
+            >>> AIConfig.pack_batches(["https://a.com/news"])
+            [['https://a.com/news']]
+        """
+        if prompt_overhead is None:
+            prompt_overhead = _estimate_tokens(_ANALYSIS_PREFIX) + 50
+
+        batches = []
+        current_batch = []
+        current_tokens = prompt_overhead
+
+        for url in urls:
+            url_tokens = _estimate_tokens(url)
+
+            if current_batch and current_tokens + url_tokens > cls.MAX_TOKENS_PER_REQUEST:
+                batches.append(current_batch)
+                current_batch = []
+                current_tokens = prompt_overhead
+
+            current_batch.append(url)
+            current_tokens += url_tokens
+
+        if current_batch:
+            batches.append(current_batch)
+
+        return batches
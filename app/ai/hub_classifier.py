@@ -0,0 +1,104 @@
+# ==============================================================================
+# hub_classifier.py — local content-hub scoring
+# ==============================================================================
+# Purpose: Rank URLs by how likely they are to be content discovery hubs without
+#          calling an LLM, so only the strongest candidates reach the model
+# Sections: Imports, Public exports, Main Classes, Helper Functions
+# ==============================================================================
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+
+# Standard Library -----
+import heapq
+import math
+import re
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+# ==============================================================================
+# Public exports
+# ==============================================================================
+__all__ = ["HubClassifier", "hub_classifier"]
+
+# ==============================================================================
+# Main Classes
+# ==============================================================================
+
+class HubClassifier:
+    """Linear scorer over URL features that estimates P(url is a content hub)."""
+
+    BIAS = -1.0
+
+    # (pattern, weight) pairs matched against the lowercased URL path
+    FEATURES: Tuple[Tuple[re.Pattern, float], ...] = (
+        (re.compile(r"(?:^|/)(?:news|blog|press(?:-releases?)?|articles|publications|reports|judgments|updates|announcements|media|insights|events)(?:/|$)"), 2.5),
+        (re.compile(r"(?:latest|recent|whats-new|archive)"), 1.5),
+        (re.compile(r"/(?:news|blog|articles|publications|updates|announcements)/?$"), 1.5),
+        (re.compile(r"/\d{4}(?:/\d{1,2})?(?:/|$)"), -2.0),
+        (re.compile(r"/[^/]*(?:-[^/-]+){4,}/?$"), -1.5),
+        (re.compile(r"/[^/]{40,}/?$"), -1.0),
+        (re.compile(r"\.(?:pdf|docx?|xlsx?|csv|jpe?g|png|gif|zip)$"), -3.0),
+        (re.compile(r"\.(?:html?|php|aspx?|jsp)$"), -1.0),
+        (re.compile(r"/(?:about|contact|privacy|terms|cookies?|legal|sitemap|faq|login|signup|accessibility)(?:[/-]|$)"), -3.0),
+        (re.compile(r"/(?:page|p)/\d+/?$|/tag/|/author/"), -1.0),
+    )
+
+    # Extra path segments beyond this depth count against a URL
+    PREFERRED_DEPTH = 2
+    DEPTH_PENALTY = 0.4
+
+    def score_url(self, url: str) -> float:
+        """
+        Score a single URL.
+
+        Args:
+            url: Absolute URL to score
+
+        Returns:
+            Probability-like score in (0, 1); higher means more hub-like
+        """
+        parts = urlsplit(url)
+        path = parts.path.lower()
+
+        logit = self.BIAS
+        for pattern, weight in self.FEATURES:
+            if pattern.search(path):
+                logit += weight
+
+        depth = len([segment for segment in path.split("/") if segment])
+        logit -= self.DEPTH_PENALTY * max(0, depth - self.PREFERRED_DEPTH)
+
+        if parts.query:
+            logit -= 0.5
+
+        return _sigmoid(logit)
+
+    def rank_urls(self, urls: List[str], top_k: int) -> List[str]:
+        """
+        Return the top_k most hub-like URLs, best first.
+
+        Args:
+            urls: Candidate URLs
+            top_k: Maximum number of URLs to keep
+
+        Returns:
+            Up to top_k URLs ordered by descending score; ties keep input order
+        """
+        if len(urls) <= top_k:
+            return sorted(urls, key=self.score_url, reverse=True)
+
+        return heapq.nlargest(top_k, urls, key=self.score_url)
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def _sigmoid(value: float) -> float:
+    """Logistic function."""
+    return 1.0 / (1.0 + math.exp(-value))
+
+
+# Global instance
+hub_classifier = HubClassifier()
@@ -0,0 +1,189 @@
+# ==============================================================================
+# prompt_cache.py — LLM response cache
+# ==============================================================================
+# Purpose: Skip duplicate and near-duplicate LLM calls by caching responses
+# Sections: Imports, Public exports, Main Classes, Helper Functions
+# ==============================================================================
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+
+# Standard Library -----
+import hashlib
+import heapq
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Astral AI ----
+from app.utils.file_utils import atomic_write
+
+# ==============================================================================
+# Public exports
+# ==============================================================================
+__all__ = ["PromptCache", "prompt_cache"]
+
+# ==============================================================================
+# Main Classes
+# ==============================================================================
+
+class PromptCache:
+    """On-disk cache of LLM results keyed by a hash of the canonical request."""
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        ttl_seconds: int = 86400,
+        similarity_threshold: float = 0.98,
+        max_similar_entries: int = 5,
+        sketch_size: int = 256
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding one JSON file per cached request
+            ttl_seconds: Age after which an entry is treated as a miss
+            similarity_threshold: Minimum Jaccard similarity for a near-duplicate hit
+            max_similar_entries: Recent URL sets kept per scope for similarity lookups
+            sketch_size: Hashes kept per URL set fingerprint (see make_sketch)
+        """
+        self.cache_dir = cache_dir or _get_project_root() / "cache" / "prompts"
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_similar_entries = max_similar_entries
+        self.sketch_size = sketch_size
+
+        # serializes the read-modify-write of scope indexes across worker threads
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, site_name: str, urls: List[str]) -> str:
+        """
+        Hash (model, prompt_version, site_name, urls) so URL order does not affect the key.
+
+        prompt_version identifies the prompt templates (AIConfig.PROMPT_VERSION),
+        so editing a prompt stops serving selections made under the old one.
+        """
+        canonical = f"{model}|{prompt_version}|{site_name}|{sorted(urls)!r}"
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_scope(model: str, prompt_version: str, site_name: str) -> str:
+        """Hash (model, prompt_version, site_name) to group entries eligible for similarity hits."""
+        return hashlib.sha256(f"{model}|{prompt_version}|{site_name}".encode("utf-8")).hexdigest()
+
+    def make_sketch(self, urls: List[str]) -> List[int]:
+        """
+        Fingerprint a URL set as the sketch_size smallest 64-bit URL hashes (bottom-k sketch).
+
+        Sketches stay a few KB however many URLs a sitemap lists; two sets
+        whose union has at most sketch_size URLs are compared exactly.
+        """
+        hashes = {
+            int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+            for url in urls
+        }
+        return heapq.nsmallest(self.sketch_size, hashes)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None on miss or expiry."""
+        entry = self._read_json(self.cache_dir / f"{key}.json")
+
+        if entry is None or self._is_expired(entry):
+            return None
+
+        return entry.get("value")
+
+    def get_similar(self, scope: str, sketch: List[int]) -> Optional[Dict[str, Any]]:
+        """
+        Return the value cached for a near-identical URL set in the same scope.
+
+        Args:
+            scope: Scope from make_scope()
+            sketch: Fingerprint of the current URL set from make_sketch()
+
+        Returns:
+            Value of the most similar fresh entry at or above
+            similarity_threshold (estimated Jaccard), otherwise None.
+        """
+        entries = self._read_json(self._scope_path(scope)) or []
+
+        best_value = None
+        best_similarity = self.similarity_threshold
+        for entry in entries:
+            if self._is_expired(entry):
+                continue
+
+            similarity = _sketch_similarity(sketch, entry["sketch"], self.sketch_size)
+            if similarity >= best_similarity:
+                best_value = entry["value"]
+                best_similarity = similarity
+
+        return best_value
+
+    def set(self, key: str, value: Dict[str, Any], scope: str = None, sketch: List[int] = None) -> None:
+        """Store value under key, and in the scope's similarity index when given."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {"created_at": time.time(), "value": value}
+
+        self._write_json(self.cache_dir / f"{key}.json", entry)
+
+        if scope is not None and sketch is not None:
+            scope_path = self._scope_path(scope)
+            with self._index_lock:
+                entries = self._read_json(scope_path) or []
+                entries.append({**entry, "sketch": list(sketch)})
+                self._write_json(scope_path, entries[-self.max_similar_entries:])
+
+    def _scope_path(self, scope: str) -> Path:
+        """Path of the similarity index file for a scope."""
+        return self.cache_dir / f"scope_{scope}.json"
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Check whether a cache entry is older than ttl_seconds."""
+        return time.time() - entry.get("created_at", 0) > self.ttl_seconds
+
+    def _read_json(self, file_path: Path) -> Optional[Any]:
+        """Read a JSON cache file, treating missing or corrupt files as a miss."""
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, file_path: Path, data: Any) -> None:
+        """Write a JSON cache file atomically, so readers never see a truncated entry."""
+        atomic_write(file_path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def _sketch_similarity(first: List[int], second: List[int], sketch_size: int) -> float:
+    """
+    Estimated Jaccard similarity of two URL sets from their bottom-k sketches.
+
+    Takes the sketch_size smallest hashes of the union and counts how many
+    appear in both sketches (exact when the union fits in one sketch; 1.0 when both are empty).
+    """
+    first_hashes = set(first)
+    second_hashes = set(second)
+    union_sketch = heapq.nsmallest(sketch_size, first_hashes | second_hashes)
+    if not union_sketch:
+        return 1.0
+
+    shared = sum(1 for value in union_sketch if value in first_hashes and value in second_hashes)
+    return shared / len(union_sketch)
+
+
+def _get_project_root() -> Path:
+    """Get the project root directory."""
+    return Path(__file__).parent.parent.parent
+
+
+# Global instance
+prompt_cache = PromptCache()
@@ -5,10 +5,47 @@
 # Sections: Imports, Public exports
 # ==============================================================================
 
-from .firecrawl_client import FirecrawlClient
-from .openai_client import OpenAIClient
+import importlib
+import sys
+
+# submodules are imported on first attribute access (PEP 562)
+_LAZY_IMPORTS = {
+    "FirecrawlClient": ".firecrawl_client",
+    "OpenAIClient": ".openai_client",
+}
+
+
+def __getattr__(name: str):
+    """Import a public name on first access and cache it on the package."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+async def close_all() -> None:
+    """
+    Close the shared HTTP clients; call before the event loop that used them ends.
+
+    The Firecrawl SDK opens and closes its own session per request, so only the
+    OpenAI and sitemap clients hold pooled connections. Modules that were never
+    imported opened nothing, so they are skipped rather than imported here.
+    """
+    openai_client = sys.modules.get("app.clients.openai_client")
+    if openai_client is not None:
+        await openai_client.OpenAIClient.close_shared()
+
+    sitemap_crawler = sys.modules.get("app.crawler.sitemap_crawler")
+    if sitemap_crawler is not None:
+        await sitemap_crawler.SitemapCrawler.close_shared()
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 # ==============================================================================
 # Public exports
 # ==============================================================================
-__all__ = ["FirecrawlClient", "OpenAIClient"]
+__all__ = ["FirecrawlClient", "OpenAIClient", "close_all"]
@@ -11,41 +11,84 @@
 
 # Standard Library -----
 import asyncio
-from typing import List, Optional
+import logging
+import re
+from functools import partial
+from typing import ClassVar, List, Optional, Tuple
 
 # Third Party -----
+import aiohttp
+import orjson
 from firecrawl import AsyncFirecrawlApp
 from firecrawl import ScrapeOptions
 
 # Astral AI ----
 from app.services.config_service import config_service
+from app.utils.rate_limiter import TokenBucket, gather_with_concurrency
 
 # ==============================================================================
 # Public exports
 # ==============================================================================
-__all__ = ["FirecrawlClient"]
+__all__ = ["FirecrawlClient", "FirecrawlRateLimited"]
+
+logger = logging.getLogger(__name__)
 
 # ==============================================================================
 # Main Classes
 # ==============================================================================
 
+class FirecrawlRateLimited(aiohttp.ClientError):
+    """The Firecrawl API answered HTTP 429 (Too Many Requests)."""
+
+
+class _StatusAwareFirecrawlApp(AsyncFirecrawlApp):
+    """SDK app that reports HTTP 429 as FirecrawlRateLimited instead of a bare ClientError."""
+    
+    async def _handle_error(self, response: aiohttp.ClientResponse, action: str) -> None:
+        # the SDK only formats the status into its message, so it is read here instead;
+        # FirecrawlRateLimited is still a ClientError, so the SDK's own retries treat it alike
+        if response.status == 429:
+            raise FirecrawlRateLimited(f"Rate limited while trying to {action}")
+        await super()._handle_error(response, action)
+
+
 class FirecrawlClient:
     """Client for Firecrawl SDK communication."""
     
+    # response fields that may carry URL lists, in priority order
+    _URL_FIELDS = ('links', 'urls', 'pages', 'results')
+    
+    # crawled links worth keeping: absolute http(s) URLs, surrounding whitespace allowed
+    _HTTP_LINK_PATTERN = re.compile(r'\s*https?://', re.IGNORECASE)
+    
+    # URLs submitted per batch scrape job
+    _BATCH_SCRAPE_SIZE = 100
+    
+    # SDK app shared by every client instance, created on first use; it holds no
+    # connections (the SDK opens and closes an aiohttp session per request), so
+    # there is nothing to close on shutdown
+    _shared_app: ClassVar[Optional[AsyncFirecrawlApp]] = None
+    
+    # process-wide request budget for the Firecrawl API, created on first use
+    _rate_limiter: ClassVar[Optional[TokenBucket]] = None
+    
     def __init__(self):
         self.api_key = config_service.firecrawl_api_key
         self._app: Optional[AsyncFirecrawlApp] = None
+        self._max_concurrent_crawls = 20
         
     async def __aenter__(self):
         """Async context manager for SDK client lifecycle."""
-        self._app = AsyncFirecrawlApp(api_key=self.api_key)
+        if FirecrawlClient._shared_app is None:
+            FirecrawlClient._shared_app = _StatusAwareFirecrawlApp(api_key=self.api_key)
+        if FirecrawlClient._rate_limiter is None:
+            FirecrawlClient._rate_limiter = TokenBucket(config_service.firecrawl_requests_per_minute)
+        self._app = FirecrawlClient._shared_app
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Clean up SDK client."""
-        if self._app:
-            # SDK handles cleanup automatically
-            pass
+        """Release the shared SDK app (it stays alive for reuse)."""
+        pass
     
     async def map_site(self, url: str, include_subdomains: bool = True) -> List[str]:
         """
@@ -62,34 +105,20 @@ class FirecrawlClient:
             raise RuntimeError("Client must be used as async context manager")
             
         try:
-            print(f"🔍 Mapping site: {url}")
+            logger.debug("Mapping site: %s", url)
+            await self._rate_limiter.acquire()
             response = await self._app.map_url(
                 url=url,
                 limit=30000,
                 include_subdomains=include_subdomains
             )
             
-            print(f"🔍 Map response type: {type(response)}")
-            print(f"🔍 Map response: {response}")
+            logger.debug("Map response type: %s", type(response))
             
             # extract URLs from response
-            if hasattr(response, 'links'):
-                urls = response.links
-                print(f"🔍 Found {len(urls)} URLs in response.links")
-                return urls
-            elif hasattr(response, 'urls'):
-                urls = response.urls
-                print(f"🔍 Found {len(urls)} URLs in response.urls")
-                return urls
-            elif isinstance(response, dict):
-                urls = response.get('links', []) or response.get('urls', [])
-                print(f"🔍 Found {len(urls)} URLs in response dict")
-                return urls
-            else:
-                # fallback - try to extract URLs from response
-                urls = self._extract_urls_from_response(response)
-                print(f"🔍 Found {len(urls)} URLs using fallback extraction")
-                return urls
+            urls = self._extract_urls_from_response(response)
+            logger.debug("Found %d URLs in map response", len(urls))
+            return urls
             
         except Exception as e:
             raise Exception(f"Firecrawl map SDK call failed: {str(e)}")
@@ -109,25 +138,74 @@ class FirecrawlClient:
         if not self._app:
             raise RuntimeError("Client must be used as async context manager")
             
-        all_discovered_urls = []
+        all_discovered_urls: set[str] = set()
         
-        # process URLs in batches to avoid overwhelming the API
-        batch_size = 5
-        for i in range(0, len(urls), batch_size):
-            batch = urls[i:i + batch_size]
-            
-            tasks = [
-                self.crawl_single_url(url, max_depth, limit)
-                for url in batch
-            ]
-            
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # keep a bounded number of crawls in flight instead of lock-step batches
+        results = await gather_with_concurrency(
+            urls,
+            lambda url: self.crawl_single_url(url, max_depth, limit),
+            self._max_concurrent_crawls
+        )
+        
+        for result in results:
+            if isinstance(result, list):
+                all_discovered_urls.update(result)  # dedupe as results arrive
+        
+        return list(all_discovered_urls)
+
+    async def batch_scrape_links(self, urls: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Raw SDK call to Firecrawl batch scrape endpoint, collecting the links on each page.
+        
+        One job covers up to _BATCH_SCRAPE_SIZE URLs, so submission and status polling
+        are paid per batch instead of per URL. A failed job only loses its own URLs.
+        
+        Args:
+            urls: List of URLs to scrape
             
-            for result in batch_results:
-                if isinstance(result, list):
-                    all_discovered_urls.extend(result)
+        Returns:
+            Tuple of (http(s) links found on the scraped pages, URLs whose batch failed)
+        """
+        if not self._app:
+            raise RuntimeError("Client must be used as async context manager")
+        
+        batches = [urls[i:i + self._BATCH_SCRAPE_SIZE] for i in range(0, len(urls), self._BATCH_SCRAPE_SIZE)]
+        results = await asyncio.gather(
+            *(self._batch_scrape_batch(batch) for batch in batches),
+            return_exceptions=True
+        )
         
-        return list(set(all_discovered_urls))  # remove duplicates
+        links: List[str] = []
+        failed_urls: List[str] = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.warning("Batch scrape of %d URLs failed: %s", len(batch), result)
+                failed_urls.extend(batch)
+            else:
+                links.extend(result)
+        
+        return links, failed_urls
+    
+    async def _batch_scrape_batch(self, urls: List[str]) -> List[str]:
+        """Run one batch scrape job to completion (the SDK polls it) and extract its links."""
+        logger.debug("Starting batch scrape of %d URLs", len(urls))
+        await self._rate_limiter.acquire()
+        response = await self._app.batch_scrape_urls(
+            urls,
+            formats=['links'],
+            only_main_content=True,
+            timeout=config_service.firecrawl_timeout_ms
+        )
+        
+        is_http = self._HTTP_LINK_PATTERN.match
+        links = [
+            link.strip()
+            for doc in (response.data or [])
+            for link in (doc.links or [])
+            if isinstance(link, str) and is_http(link)
+        ]
+        logger.debug("Batch scrape of %d URLs found %d links", len(urls), len(links))
+        return links
 
     async def crawl_single_url(self, url: str, max_depth: int, limit: int) -> List[str]:
         """
@@ -140,6 +218,9 @@ class FirecrawlClient:
             
         Returns:
             List of discovered URLs
+            
+        Raises:
+            FirecrawlRateLimited: When the API still answers 429 after every retry
         """
         max_retries = 3
         base_delay = 10  # Base delay for rate limit errors
@@ -147,7 +228,8 @@ class FirecrawlClient:
         for attempt in range(max_retries):
             try:
                 # Use synchronous crawl_url which waits for completion and returns full response
-                print(f"🔍 Starting crawl for {url}...")
+                logger.debug("Starting crawl for %s", url)
+                await self._rate_limiter.acquire()
                 crawl_response = await self._app.crawl_url(
                     url=url,
                     max_depth=max_depth,
@@ -161,53 +243,50 @@ class FirecrawlClient:
                     )
                 )
                 
-                print(f"🔍 Crawl response type: {type(crawl_response)}")
-                print(f"🔍 Crawl response: {crawl_response}")
+                logger.debug("Crawl response type: %s", type(crawl_response))
                 
                 # According to docs, synchronous crawl_url should return completed results directly
                 # Check if we have data with URLs
                 if hasattr(crawl_response, 'data') and crawl_response.data:
-                    print(f"🔍 Found data with {len(crawl_response.data)} items")
+                    logger.debug("Found data with %d items", len(crawl_response.data))
                     # Extract URLs from the crawled documents
                     urls = []
-                    for i, doc in enumerate(crawl_response.data):
-                        print(f"🔍 Processing document {i}: {doc}")
-                        
+                    for doc in crawl_response.data:
                         # Extract URLs from the links field (this is what we actually want)
                         if hasattr(doc, 'links') and doc.links:
-                            # Add all valid links from the document
-                            for link in doc.links:
-                                if isinstance(link, str) and link.strip() and link.startswith('http'):
-                                    urls.append(link)
-                                    print(f"🔍 Added link: {link}")
+                            # Add all valid links from the document in one C-level pass
+                            is_http = self._HTTP_LINK_PATTERN.match
+                            urls.extend(
+                                link.strip() for link in doc.links
+                                if isinstance(link, str) and is_http(link)
+                            )
                         else:
-                            print(f"🔍 Document has no links field: {type(doc)}")
-                            if hasattr(doc, '__dict__'):
-                                print(f"🔍 Document attributes: {dir(doc)}")
+                            logger.debug("Document has no links field: %s", type(doc))
                     
-                    print(f"🔍 Total URLs extracted: {len(urls)}")
+                    logger.debug("Total URLs extracted from %s: %d", url, len(urls))
                     return urls
                 else:
-                    print(f"🔍 No data found in crawl response")
+                    logger.debug("No data found in crawl response for %s", url)
                     return []
                     
-            except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's a rate limit error
-                if "429" in error_str or "rate limit" in error_str.lower():
-                    if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)  # Exponential backoff
-                        print(f"🔍 Rate limit hit for {url}, retrying in {delay} seconds (attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(delay)
-                        continue
-                    else:
-                        print(f"🔍 Rate limit error for {url} after {max_retries} attempts, skipping")
-                        return []
+            except FirecrawlRateLimited:
+                if attempt < max_retries - 1:
+                    delay = base_delay * (2 ** attempt)  # Exponential backoff
+                    logger.info("Rate limit hit for %s, retrying in %s seconds (attempt %d/%d)", url, delay, attempt + 1, max_retries)
+                    await asyncio.sleep(delay)
                 else:
-                    # Non-rate-limit error, don't retry
-                    print(f"Error crawling {url}: {str(e)}")
-                    return []
+                    logger.warning("Rate limit error for %s after %d attempts, giving up", url, max_retries)
+                    raise
+                    
+            except aiohttp.ClientError as e:
+                # Non-rate-limit API error, don't retry
+                logger.warning("Error crawling %s: %s", url, e)
+                return []
+                    
+            except Exception as e:
+                # Unexpected failure (job failed to start, malformed response); never retried
+                logger.warning("Error crawling %s: %s", url, e)
+                return []
         
         return []
     
@@ -221,30 +300,29 @@ class FirecrawlClient:
         Returns:
             List of URLs extracted from response
         """
-        # try different ways to extract URLs from the response
-        if hasattr(response, '__dict__'):
-            # check common attributes
-            for attr in ['links', 'urls', 'pages', 'results']:
-                if hasattr(response, attr):
-                    value = getattr(response, attr)
-                    if isinstance(value, list):
-                        return value
-                    elif isinstance(value, dict) and 'url' in value:
-                        return [value['url']]
+        # raw JSON bodies are decoded with orjson before field lookup
+        if isinstance(response, (str, bytes, bytearray)):
+            try:
+                response = orjson.loads(response)
+            except orjson.JSONDecodeError:
+                logger.warning("Could not decode JSON response (%d bytes)", len(response))
+                return []
         
         # if response is a list, assume it contains URLs
         if isinstance(response, list):
             return response
         
-        # if response is a dict, look for URL-like keys
-        if isinstance(response, dict):
-            for key in ['links', 'urls', 'pages', 'results']:
-                if key in response:
-                    value = response[key]
-                    if isinstance(value, list):
-                        return value
+        # one lookup per candidate field: dict keys, or attributes with a default
+        # (getattr also sees properties and slots that __dict__ would miss)
+        lookup = response.get if isinstance(response, dict) else partial(getattr, response)
+        for field in self._URL_FIELDS:
+            value = lookup(field, None)
+            if isinstance(value, list):
+                return value
+            if isinstance(value, dict) and 'url' in value:
+                return [value['url']]
         
         # fallback - return empty list
-        print(f"Could not extract URLs from response type: {type(response)}")
+        logger.warning("Could not extract URLs from response type: %s", type(response))
         return [] 
     
\ No newline at end of file
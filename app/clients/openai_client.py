@@ -10,15 +10,18 @@
 # ==============================================================================
 
 # Standard Library -----
-import json
+import asyncio
 from datetime import datetime
-from typing import List
+from typing import ClassVar, Dict, List, Optional
 
 # Third Party -----
+import orjson
 from openai import AsyncOpenAI
 
 # Astral AI ----
+from app.ai.config import AIConfig
 from app.services.config_service import config_service
+from app.utils.rate_limiter import TokenBucket
 from app.models.url_models import (
     UrlAnalysisRequest, 
     UrlAnalysisResponse, 
@@ -40,8 +43,64 @@ __all__ = ["OpenAIClient"]
 class OpenAIClient:
     """Thin client for OpenAI API communication."""
     
+    # API clients shared by every instance so connection pools are reused; pooled
+    # connections belong to the loop that opened them, so each event loop gets its own
+    _shared_clients: ClassVar[Dict[Optional[asyncio.AbstractEventLoop], AsyncOpenAI]] = {}
+    
+    # process-wide request and token budgets, created on first use
+    _request_limiter: ClassVar[Optional[TokenBucket]] = None
+    _token_limiter: ClassVar[Optional[TokenBucket]] = None
+    
+    # system messages are identical on every call, so they are built once and shared
+    _ANALYSIS_SYSTEM_MESSAGE: ClassVar[Dict[str, str]] = {
+        "role": "system",
+        "content": "You are an expert at analyzing website URLs to identify which pages serve as content discovery hubs - pages that contain links to multiple articles and get updated when new content is published. You should NOT select individual article pages."
+    }
+    _JUDGE_SYSTEM_MESSAGE: ClassVar[Dict[str, str]] = {
+        "role": "system",
+        "content": "You are an expert judge that reviews multiple AI suggestions and selects the best URLs for monitoring. You should prioritize content discovery hubs - pages that serve as entry points to discover new articles and content, NOT individual article pages."
+    }
+    
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config_service.get_openai_api_key)
+        self.client = self._get_shared_client()
+        
+        if OpenAIClient._request_limiter is None:
+            OpenAIClient._request_limiter = TokenBucket(config_service.openai_requests_per_minute)
+            OpenAIClient._token_limiter = TokenBucket(config_service.openai_tokens_per_minute)
+    
+    async def _wait_for_capacity(self, prompt: str, model: str) -> None:
+        """Wait client-side for request and token budget before calling the API."""
+        await self._request_limiter.acquire()
+        await self._token_limiter.acquire(AIConfig.estimate_tokens(prompt, model))
+    
+    @classmethod
+    def _get_shared_client(cls) -> AsyncOpenAI:
+        """Return the shared API client for the current event loop, creating it if needed."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        client = cls._shared_clients.get(loop)
+        if client is None:
+            # clients of loops that have since closed can no longer be closed; forget them
+            for stale_loop in [l for l in cls._shared_clients if l is not None and l.is_closed()]:
+                del cls._shared_clients[stale_loop]
+            client = cls._shared_clients[loop] = AsyncOpenAI(api_key=config_service.get_openai_api_key)
+        
+        return client
+    
+    @classmethod
+    async def close_shared(cls) -> None:
+        """Close the shared API clients and their connection pools, each on its own event loop."""
+        current_loop = asyncio.get_running_loop()
+        clients, cls._shared_clients = cls._shared_clients, {}
+        
+        for loop, client in clients.items():
+            if loop is None or loop is current_loop:
+                await client.close()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.close(), loop))
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -54,10 +113,11 @@ class OpenAIClient:
     async def analyze_urls(self, request: UrlAnalysisRequest, prompt: str, model: str = "gpt-4o-mini") -> OutputURLsWithInfo:
         """Raw API call to OpenAI for URL analysis."""
         try:
+            await self._wait_for_capacity(prompt, model)
             response = await self.client.chat.completions.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": "You are an expert at analyzing website URLs to identify which pages serve as content discovery hubs - pages that contain links to multiple articles and get updated when new content is published. You should NOT select individual article pages."},
+                    self._ANALYSIS_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
@@ -65,22 +125,21 @@ class OpenAIClient:
             )
             
             content = response.choices[0].message.content
-            data = json.loads(content)
+            data = orjson.loads(content)
             
-            # create UrlInfo objects for the selected URLs (no detection method for AI analysis)
+            # create UrlInfo objects for the selected URLs; they share the result's
+            # timestamp, so they carry no detected_at of their own
             url_infos = [
                 UrlInfo(
                     url=url,
-                    detection_methods=[],  # AI analysis doesn't get a detection method
-                    detected_at=datetime.now()
+                    detection_methods=[]  # AI analysis doesn't get a detection method
                 )
-                for url in data.get("urls", [])
+                for url in AIConfig.expand_urls(request, data.get("urls", []))
             ]
             
             return OutputURLsWithInfo(
                 urls=url_infos,
-                total_count=len(url_infos),
-                timestamp=datetime.now()
+                total_count=len(url_infos)
             )
             
         except Exception as e:
@@ -89,10 +148,11 @@ class OpenAIClient:
     async def judge_selection(self, request: UrlJudgeRequest, prompt: str, model: str = "gpt-4o-mini") -> UrlJudgeResponse:
         """Raw API call to OpenAI for URL selection judging."""
         try:
+            await self._wait_for_capacity(prompt, model)
             response = await self.client.chat.completions.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": "You are an expert judge that reviews multiple AI suggestions and selects the best URLs for monitoring. You should prioritize content discovery hubs - pages that serve as entry points to discover new articles and content, NOT individual article pages."},
+                    self._JUDGE_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
@@ -100,7 +160,7 @@ class OpenAIClient:
             )
             
             content = response.choices[0].message.content
-            data = json.loads(content)
+            data = orjson.loads(content)
             
             return UrlJudgeResponse(
                 selected_urls=data.get("urls", []),
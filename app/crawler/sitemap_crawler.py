@@ -2,7 +2,7 @@
 # sitemap_crawler.py — Sitemap XML parsing utilities
 # ==============================================================================
 # Purpose: Handle sitemap XML parsing and URL extraction
-# Sections: Imports, Public API, Main Classes
+# Sections: Imports, Public API, Data Structures, Main Classes
 # ==============================================================================
 
 # ==============================================================================
@@ -11,22 +11,53 @@
 
 # Standard Library -----
 import asyncio
+import logging
 import xml.etree.ElementTree as ET
-from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar, List, Literal, Optional, Dict, Any, Tuple, TypeVar
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
 # Third Party -----
-import aiohttp
+import httpx
 
 # Astral AI ----
 from app.models.url_models import UrlInfo, DetectionMethod
+from app.utils.rate_limiter import gather_with_concurrency
 
 # ==============================================================================
 # Public exports
 # ==============================================================================
 __all__ = ["SitemapCrawler"]
 
+logger = logging.getLogger(__name__)
+
+# sitemap protocol namespace and the incremental parser's feed size
+_SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+_LOC_TAG = f"{{{_SITEMAP_NS}}}loc"
+_PARSE_CHUNK_SIZE = 64 * 1024
+
+# sitemap indexes nested deeper than this are not followed
+_MAX_INDEX_DEPTH = 3
+
+# upper bound on parsed URLs (summed over all sitemaps) remembered for conditional GETs,
+# which keeps the cache to a few tens of MB however many sitemaps are crawled
+_CONDITIONAL_CACHE_MAX_URLS = 200_000
+
+T = TypeVar("T")
+
+# ==============================================================================
+# Data Structures
+# ==============================================================================
+
+@dataclass
+class _SitemapCrawl:
+    """State of one top-level sitemap crawl, shared by every nested index level."""
+    # caps this crawl's sitemap requests in flight, across all index levels
+    request_slots: asyncio.Semaphore
+    # sitemaps already fetched (or in flight) during this crawl
+    visited: set[str] = field(default_factory=set)
+
 # ==============================================================================
 # Main Classes
 # ==============================================================================
@@ -34,20 +65,59 @@ __all__ = ["SitemapCrawler"]
 class SitemapCrawler:
     """Thin client for sitemap XML parsing with comprehensive sitemap index support."""
     
+    # HTTP/2 client shared by every crawler so pooled connections are reused and
+    # child sitemaps on one host are multiplexed over a single connection
+    _shared_client: ClassVar[Optional[httpx.AsyncClient]] = None
+    _shared_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    
+    # (url, parser) -> (validator request headers, parsed result, URL count) from the
+    # last 200 response, in least to most recently used order
+    _conditional_cache: ClassVar[Dict[Tuple[str, str], Tuple[Dict[str, str], Any, int]]] = {}
+    # URLs held across all cached results, kept within _CONDITIONAL_CACHE_MAX_URLS
+    _conditional_cache_urls: ClassVar[int] = 0
+    
     def __init__(self):
-        self._client: Optional[aiohttp.ClientSession] = None
+        self._client: Optional[httpx.AsyncClient] = None
         self._timeout = 30
-        self._max_concurrent_requests = 10
+        self._max_concurrent_requests = 50
         
     async def __aenter__(self):
         """Async context manager for HTTP client lifecycle."""
-        self._client = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self._timeout))
+        self._client = self._get_shared_client(self._timeout)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Clean up HTTP client."""
-        if self._client:
-            await self._client.close()
+        """Release the shared HTTP client (it stays open for reuse)."""
+        pass
+    
+    @classmethod
+    def _get_shared_client(cls, timeout: int) -> httpx.AsyncClient:
+        """Return the shared client, opening one for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        client = cls._shared_client
+        
+        if client is None or client.is_closed or cls._shared_loop is not loop:
+            cls._shared_client = httpx.AsyncClient(
+                http2=True,
+                timeout=timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=50,
+                    keepalive_expiry=75
+                )
+            )
+            cls._shared_loop = loop
+        
+        return cls._shared_client
+    
+    @classmethod
+    async def close_shared(cls) -> None:
+        """Close the shared HTTP client."""
+        if cls._shared_client is not None and not cls._shared_client.is_closed:
+            await cls._shared_client.aclose()
+        cls._shared_client = None
+        cls._shared_loop = None
     
     async def parse_sitemap(self, sitemap_url: str) -> List[UrlInfo]:
         """Parse a single sitemap and return URL info objects."""
@@ -56,7 +126,8 @@ class SitemapCrawler:
             
         try:
             urls = await self._fetch_sitemap_urls(sitemap_url)
-            return [self._create_url_info(url, DetectionMethod.SITEMAP) for url in urls]
+            detected_at = datetime.now()
+            return [self._create_url_info(url, DetectionMethod.SITEMAP, detected_at) for url in urls]
             
         except Exception as e:
             raise Exception(f"Sitemap parsing failed for {sitemap_url}: {str(e)}")
@@ -68,156 +139,238 @@ class SitemapCrawler:
             
         try:
             urls = await self._fetch_sitemap_index_urls(index_url)
-            return [self._create_url_info(url, DetectionMethod.SITEMAP) for url in urls]
+            detected_at = datetime.now()
+            return [self._create_url_info(url, DetectionMethod.SITEMAP, detected_at) for url in urls]
             
         except Exception as e:
             raise Exception(f"Sitemap index parsing failed for {index_url}: {str(e)}")
     
+    def _start_crawl(self, root_url: str) -> _SitemapCrawl:
+        """Fresh per-crawl state, so concurrent crawls on one crawler never share it."""
+        return _SitemapCrawl(asyncio.Semaphore(self._max_concurrent_requests), {root_url})
+    
     async def _fetch_sitemap_urls(self, sitemap_url: str) -> List[str]:
         """Fetch and parse a single sitemap to extract URLs."""
-        async with self._client.get(sitemap_url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to fetch sitemap: {response.status}")
-            
-            content = await response.text()
-            
-            # Check if this is a sitemap index
-            if self._is_sitemap_index(content):
-                return await self._fetch_sitemap_index_urls_from_content(content, sitemap_url)
-            else:
-                return self._parse_sitemap_content(content)
+        crawl = self._start_crawl(sitemap_url)
+        
+        # One parse decides between a sitemap index and a plain sitemap
+        kind, locs = await self._fetch_parsed(sitemap_url, self._parse_any, "Failed to fetch sitemap")
+        if kind == "index":
+            return await self._fetch_urls_from_sitemaps(locs, crawl)
+        return locs
     
     async def _fetch_sitemap_index_urls(self, index_url: str) -> List[str]:
         """Fetch and parse a sitemap index to extract URLs from all referenced sitemaps."""
-        async with self._client.get(index_url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to fetch sitemap index: {response.status}")
-            
-            content = await response.text()
-            return await self._fetch_sitemap_index_urls_from_content(content, index_url)
+        crawl = self._start_crawl(index_url)
+        
+        sitemap_urls = await self._fetch_parsed(
+            index_url, self._parse_sitemap_index_content, "Failed to fetch sitemap index"
+        )
+        return await self._fetch_urls_from_sitemaps(sitemap_urls, crawl)
     
-    async def _fetch_sitemap_index_urls_from_content(self, index_content: str, index_url: str) -> List[str]:
+    async def _fetch_sitemap_index_urls_from_content(self, index_content: bytes, index_url: str) -> List[str]:
         """Fetch URLs from a sitemap index file and all referenced sitemaps."""
-        all_urls = []
+        crawl = self._start_crawl(index_url)
         
-        # Parse the sitemap index
         sitemap_urls = self._parse_sitemap_index_content(index_content)
+        return await self._fetch_urls_from_sitemaps(sitemap_urls, crawl)
+    
+    async def _fetch_urls_from_sitemaps(self, sitemap_urls: List[str], crawl: _SitemapCrawl, depth: int = 1) -> List[str]:
+        """Fetch every referenced sitemap concurrently and merge their unique URLs."""
+        all_urls: set[str] = set()
         
-        # Fetch each individual sitemap with concurrency control
-        semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+        # indexes may list a child twice, and nested indexes may point back at
+        # a sitemap this crawl already covers; fetch each one only once
+        sitemap_urls = [url for url in dict.fromkeys(sitemap_urls) if url not in crawl.visited]
+        crawl.visited.update(sitemap_urls)
         
         async def fetch_single_sitemap(sitemap_url: str) -> List[str]:
-            async with semaphore:
-                try:
-                    return await self._fetch_individual_sitemap_urls(sitemap_url)
-                except Exception as e:
-                    print(f"Error fetching sitemap {sitemap_url}: {str(e)}")
-                    return []
+            try:
+                return await self._fetch_individual_sitemap_urls(sitemap_url, crawl, depth)
+            except Exception as e:
+                logger.warning("Error fetching sitemap %s: %s", sitemap_url, e)
+                return []
         
-        # Create tasks for all sitemaps
-        tasks = [fetch_single_sitemap(sitemap_url) for sitemap_url in sitemap_urls]
-        
-        # Wait for all sitemaps to be fetched
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Fetch each individual sitemap; the crawl's request slots bound the
+        # requests in flight, however many index levels are being followed
+        results = await gather_with_concurrency(
+            sitemap_urls, fetch_single_sitemap, self._max_concurrent_requests
+        )
         
-        # Combine all URLs
+        # Combine all URLs, dropping duplicates as they arrive
         for result in results:
             if isinstance(result, list):
-                all_urls.extend(result)
+                all_urls.update(result)
         
-        return list(set(all_urls))  # Remove duplicates
+        return list(all_urls)
     
-    async def _fetch_individual_sitemap_urls(self, sitemap_url: str) -> List[str]:
-        """Fetch and parse an individual sitemap."""
+    async def _fetch_individual_sitemap_urls(self, sitemap_url: str, crawl: _SitemapCrawl, depth: int = 1) -> List[str]:
+        """Fetch and parse an individual sitemap, following it if it is itself an index."""
         try:
-            async with self._client.get(sitemap_url) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to fetch sitemap {sitemap_url}: {response.status}")
-                
-                content = await response.text()
-                return self._parse_sitemap_content(content)
+            # a slot is held only for the request itself, never while nested
+            # indexes are followed, so parents cannot starve their children
+            async with crawl.request_slots:
+                kind, locs = await self._fetch_parsed(
+                    sitemap_url, self._parse_any, f"Failed to fetch sitemap {sitemap_url}"
+                )
                 
         except Exception as e:
             raise Exception(f"Error fetching sitemap {sitemap_url}: {e}")
+        
+        if kind != "index":
+            return locs
+        if depth >= _MAX_INDEX_DEPTH:
+            logger.warning("Not following sitemap index %s nested %d levels deep", sitemap_url, depth)
+            return []
+        return await self._fetch_urls_from_sitemaps(locs, crawl, depth + 1)
     
-    def _is_sitemap_index(self, content: str) -> bool:
-        """Check if the XML content is a sitemap index."""
-        try:
-            root = ET.fromstring(content)
-            namespaces = {
-                'sitemap': 'http://www.sitemaps.org/schemas/sitemap/0.9'
-            }
-            
-            # Look for sitemap elements (indicating an index)
-            sitemap_elements = root.findall('.//sitemap:sitemap', namespaces)
-            if not sitemap_elements:
-                sitemap_elements = root.findall('.//sitemap')
+    async def _fetch_parsed(self, url: str, parse: Callable[[bytes], T], error_message: str) -> T:
+        """
+        GET a sitemap and parse it, revalidating any earlier copy with the server.
+        
+        The ETag and Last-Modified of each successful response are replayed as
+        If-None-Match / If-Modified-Since on the next fetch; a 304 reuses the
+        previously parsed result, skipping both the body transfer and the parse.
+        
+        Args:
+            url: Sitemap URL
+            parse: Parser applied to the raw body
+            error_message: Prefix for the error raised on a non-200 status
             
-            return len(sitemap_elements) > 0
-        except ET.ParseError:
-            return False
+        Returns:
+            The parsed sitemap
+        """
+        key = (url, parse.__name__)
+        cached = self._conditional_cache.get(key)
+        
+        response = await self._client.get(url, headers=cached[0] if cached else None)
+        if response.status_code == 304 and cached is not None:
+            # a revalidated entry becomes the most recently used (unless evicted meanwhile)
+            if self._conditional_cache.get(key) is cached:
+                self._conditional_cache[key] = self._conditional_cache.pop(key)
+            return cached[1]
+        if response.status_code != 200:
+            raise Exception(f"{error_message}: {response.status_code}")
+        
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = last_modified
+        
+        result = parse(response.content)
+        
+        self._store_conditional(key, validators, result)
+        
+        return result
     
-    def _parse_sitemap_index_content(self, content: str) -> List[str]:
-        """Parse sitemap index XML to extract sitemap URLs."""
-        sitemap_urls = []
+    @classmethod
+    def _store_conditional(cls, key: Tuple[str, str], validators: Dict[str, str], result: Any) -> None:
+        """Remember a parsed sitemap for revalidation, evicting least recently used entries past the URL budget."""
+        previous = cls._conditional_cache.pop(key, None)
+        if previous is not None:
+            cls._conditional_cache_urls -= previous[2]
+        
+        # parsers return a URL list, or (kind, URL list) for _parse_any
+        url_count = len(result[1] if isinstance(result, tuple) else result)
+        if not validators or url_count > _CONDITIONAL_CACHE_MAX_URLS:
+            return
+        
+        while cls._conditional_cache and cls._conditional_cache_urls + url_count > _CONDITIONAL_CACHE_MAX_URLS:
+            evicted = cls._conditional_cache.pop(next(iter(cls._conditional_cache)))
+            cls._conditional_cache_urls -= evicted[2]
+        
+        cls._conditional_cache[key] = (validators, result, url_count)
+        cls._conditional_cache_urls += url_count
+    
+    @classmethod
+    def clear_conditional_cache(cls) -> None:
+        """Forget every sitemap remembered for conditional GETs."""
+        cls._conditional_cache.clear()
+        cls._conditional_cache_urls = 0
+    
+    def _parse_any(self, content: bytes) -> Tuple[Literal["index", "urls"], List[str]]:
+        """
+        Parse sitemap XML once and dispatch on its root tag.
         
+        Returns:
+            ("index", referenced sitemap URLs) for a <sitemapindex>, otherwise
+            ("urls", page URLs)
+        """
         try:
-            namespaces = {
-                'sitemap': 'http://www.sitemaps.org/schemas/sitemap/0.9'
-            }
-            
-            root = ET.fromstring(content)
-            
-            sitemap_elements = root.findall('.//sitemap:sitemap', namespaces)
-            if not sitemap_elements:
-                sitemap_elements = root.findall('.//sitemap')
-            
-            for sitemap_elem in sitemap_elements:
-                loc_elem = sitemap_elem.find('sitemap:loc', namespaces)
-                if loc_elem is None:
-                    loc_elem = sitemap_elem.find('loc')
-                
-                if loc_elem is not None and loc_elem.text:
-                    sitemap_urls.append(loc_elem.text.strip())
-            
+            root_name, locs = self._stream_locs(content)
         except ET.ParseError as e:
-            raise Exception(f"Failed to parse sitemap index XML: {e}")
+            raise Exception(f"Failed to parse sitemap XML: {e}")
         
-        return sitemap_urls
+        return ("index" if root_name == "sitemapindex" else "urls"), locs
     
-    def _parse_sitemap_content(self, content: str) -> List[str]:
+    def _parse_sitemap_index_content(self, content: bytes) -> List[str]:
+        """Parse sitemap index XML to extract sitemap URLs."""
+        try:
+            return self._stream_locs(content, "sitemap")[1]
+        except ET.ParseError as e:
+            raise Exception(f"Failed to parse sitemap index XML: {e}")
+    
+    def _parse_sitemap_content(self, content: bytes) -> List[str]:
         """Parse sitemap XML content to extract URLs."""
-        urls = []
-        
         try:
-            namespaces = {
-                'sitemap': 'http://www.sitemaps.org/schemas/sitemap/0.9',
-                'news': 'http://www.google.com/schemas/sitemap-news/0.9'
-            }
-            
-            root = ET.fromstring(content)
+            return self._stream_locs(content, "url")[1]
+        except ET.ParseError as e:
+            raise Exception(f"Failed to parse sitemap XML: {e}")
+    
+    def _stream_locs(self, content: bytes, wrapper: Optional[str] = None) -> Tuple[str, List[str]]:
+        """
+        Stream <loc> values of every <wrapper> entry in one pass.
+        
+        Content is fed to an incremental parser in chunks and each entry is
+        discarded once read, so the element tree never holds the whole sitemap.
+        
+        Args:
+            content: Raw sitemap or sitemap index XML; the encoding declared in
+                the XML prolog is honoured, so no text decode is needed first
+            wrapper: Entry element name ("url" or "sitemap"), with or without
+                namespace; inferred from the root tag when omitted
             
-            url_elements = root.findall('.//sitemap:url', namespaces)
-            if not url_elements:
-                url_elements = root.findall('.//url')
+        Returns:
+            Local name of the root element, and stripped <loc> values in document order
+        """
+        # entry tag -> the <loc> tag in the same namespace, resolved once per document
+        loc_tags: Dict[str, str] = {}
+        locs = []
+        root = None
+        root_name = ""
+        
+        parser = ET.XMLPullParser(events=("start", "end"))
+        for offset in range(0, len(content), _PARSE_CHUNK_SIZE):
+            parser.feed(content[offset:offset + _PARSE_CHUNK_SIZE])
             
-            for url_elem in url_elements:
-                loc_elem = url_elem.find('sitemap:loc', namespaces)
-                if loc_elem is None:
-                    loc_elem = url_elem.find('loc')
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                    root_name = elem.tag.rpartition("}")[2]
+                    entry = wrapper or ("sitemap" if root_name == "sitemapindex" else "url")
+                    loc_tags = {f"{{{_SITEMAP_NS}}}{entry}": _LOC_TAG, entry: "loc"}
+                if event != "end":
+                    continue
+                loc_tag = loc_tags.get(elem.tag)
+                if loc_tag is None:
+                    continue
                 
-                if loc_elem is not None and loc_elem.text:
-                    urls.append(loc_elem.text.strip())
-            
-        except ET.ParseError as e:
-            raise Exception(f"Failed to parse sitemap XML: {e}")
+                loc_text = elem.findtext(loc_tag)
+                if loc_text:
+                    locs.append(loc_text.strip())
+                
+                # entries already read are no longer needed
+                root.clear()
         
-        return urls
+        parser.close()
+        return root_name, locs
     
-    def _create_url_info(self, url: str, detection_method: DetectionMethod) -> UrlInfo:
-        """Create a UrlInfo object with the given URL and detection method."""
-        return UrlInfo(
+    def _create_url_info(self, url: str, detection_method: DetectionMethod, detected_at: Optional[datetime] = None) -> UrlInfo:
+        """Create a UrlInfo object; pass detected_at to share one timestamp across a batch."""
+        # <loc> text is always a str and the other fields are ours, so validation is skipped
+        return UrlInfo.model_construct(
             url=url,
             detection_methods=[detection_method],
-            detected_at=datetime.now()
+            detected_at=detected_at or datetime.now()
         )
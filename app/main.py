@@ -1,25 +1,65 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException
+from app.clients import close_all
 from app.routers import url_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close shared SDK and HTTP clients when the server shuts down."""
+    yield
+    await close_all()
+
+
 app = FastAPI(
     title="URL Aggregator API",
     description="API for extracting and noting changes to URLs from various sites",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # handlers return plain dicts; orjson encodes them (and datetimes) natively
+    default_response_class=ORJSONResponse
 )
 
 # include routers
 app.include_router(url_router)
 
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request: Request, exc: HTTPException):
+    """Report HTTP errors in the API's {"error": ...} shape, including routing 404s and 405s"""
+    return ORJSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
 @app.get("/")
-def read_root():
+async def read_root():
     """Health check endpoint"""
     return {"message": "URL Aggregator API is running", "status": "healthy"}
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Detailed health check endpoint"""
     return {
         "status": "healthy",
         "version": "1.0.0",
         "service": "url-aggregator"
-    }
\ No newline at end of file
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    from app.services.config_service import config_service
+
+    # loop/http "auto" pick uvloop and httptools (installed with uvicorn[standard]);
+    # each worker keeps its own client-side rate limiters, so scale WEB_CONCURRENCY
+    # together with the *_PER_MINUTE budgets
+    uvicorn.run(
+        "app.main:app",
+        host=config_service.env_var("HOST", default="127.0.0.1"),
+        port=int(config_service.env_var("PORT", default="8000")),
+        workers=int(config_service.env_var("WEB_CONCURRENCY", default="1")),
+        loop="auto",
+        http="auto",
+        access_log=False
+    )
@@ -21,11 +21,6 @@ class SiteConfig(BaseModel):
     status: SiteStatus = SiteStatus.NOT_ONBOARDED
     last_processed: Optional[datetime] = None
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class SitesConfig(BaseModel):
     """Complete sites configuration"""
     sites: dict[str, SiteConfig] = Field(default_factory=dict)
@@ -40,9 +35,4 @@ class SiteUpdate(BaseModel):
     top_urls: Optional[List[str]] = None
     onboarding_datetime: Optional[datetime] = None
     status: Optional[SiteStatus] = None
-    last_processed: Optional[datetime] = None
-
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
\ No newline at end of file
+    last_processed: Optional[datetime] = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 from datetime import datetime
 
@@ -13,12 +13,11 @@ class UrlInfo(BaseModel):
     """Metadata for full traceability through URL processing"""
     url: str
     detection_methods: List[DetectionMethod]
-    detected_at: datetime
+    # None when the containing result's timestamp applies (e.g. AI selections)
+    detected_at: Optional[datetime] = None
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    # instances are replaced rather than edited (see url_utils.add_detection_method)
+    model_config = ConfigDict(frozen=True)
 
 class UrlResolutionResult(BaseModel):
     """Result of URL resolution operation"""
@@ -28,6 +27,9 @@ class UrlResolutionResult(BaseModel):
     error_message: Optional[str] = None
     resolution_time: Optional[float] = None  # Time taken to resolve in seconds
 
+    # built once per resolution and never modified
+    model_config = ConfigDict(frozen=True)
+
 class UrlResolutionMapping(BaseModel):
     """Mapping of original URLs to resolved URLs with metadata"""
     mappings: Dict[str, UrlResolutionResult]
@@ -37,11 +39,6 @@ class UrlResolutionMapping(BaseModel):
     processing_time_seconds: float
     timestamp: datetime = Field(default_factory=datetime.now)
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class UrlDeduplicationResult(BaseModel):
     """Result of URL deduplication operation"""
     original_urls: List[str]
@@ -54,22 +51,12 @@ class UrlDeduplicationResult(BaseModel):
     processing_time_seconds: float
     timestamp: datetime = Field(default_factory=datetime.now)
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class OutputURLsWithInfo(BaseModel):
     """URLs with metadata for traceability"""
     urls: List[UrlInfo]
     total_count: int
     timestamp: datetime = Field(default_factory=datetime.now)
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class UrlProcessingResult(BaseModel):
     """Result of URL processing operations with preserved metadata"""
     urls: List[UrlInfo]
@@ -79,11 +66,6 @@ class UrlProcessingResult(BaseModel):
     operation_type: str  # "deduplication", "normalization", "filtering", etc.
     metadata: Dict[str, Union[str, int, float, bool, List[str]]] = Field(default_factory=dict)  # Operation-specific data
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 
 
 class OnboardingResult(BaseModel):
@@ -93,11 +75,6 @@ class OnboardingResult(BaseModel):
     onboarding_time: datetime
     total_urls_analyzed: int
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class UrlSet(BaseModel):
     """Complete set of URLs found for a site"""
     site_id: str
@@ -105,11 +82,6 @@ class UrlSet(BaseModel):
     urls: List[UrlInfo]
     total_count: int
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
-
 class UrlAnalysisRequest(BaseModel):
     """Request for AI LLM newsworthy analysis of URLs"""
     urls: List[str]
@@ -139,9 +111,4 @@ class ProcessingSummary(BaseModel):
     processing_time_seconds: float
     errors: List[str] = Field(default_factory=list)
     warnings: List[str] = Field(default_factory=list)
-    detection_methods_used: List[str] = Field(default_factory=list)
-
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
\ No newline at end of file
+    detection_methods_used: List[str] = Field(default_factory=list)
\ No newline at end of file
@@ -9,8 +9,15 @@
 # Imports
 # ==============================================================================
 
+# Standard Library -----
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, List
+
 # Third Party -----
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
 # Astral AI ----
 from app.services.config_service import config_service
@@ -22,48 +29,74 @@ from app.services.url_service import UrlService
 
 router = APIRouter(prefix="/api/v1", tags=["urls"])
 
+# the site listing only changes when sites.yaml does; let clients and proxies reuse it briefly
+_SITES_CACHE_HEADERS = {"Cache-Control": "public, max-age=60"}
+
+@lru_cache(maxsize=1)
+def _shared_url_service() -> UrlService:
+    """Build the UrlService shared by all requests (its clients pool connections at class level)"""
+    return UrlService()
+
+async def get_url_service() -> UrlService:
+    """Dependency returning the shared UrlService; async so it resolves without a threadpool hop"""
+    return _shared_url_service()
+
 @router.get("/sites")
 def list_sites():
     """List all available sites from yaml.config"""
-    sites = config_service.all_sites
-    
-    return {
-        site_id: {
-            "name": site_info.name,
-            "url": site_info.url,
-            "sitemap_url": site_info.sitemap_url,
-            "is_sitemap_index": site_info.is_sitemap_index
-        }
-        for site_id, site_info in sites.items()
-    }
+    # the listing only changes with the config, so it is served pre-serialized; checking
+    # for config edits stats sites.yaml (and re-parses it after one), so this stays a sync
+    # handler that FastAPI runs in its threadpool, off the event loop
+    return Response(
+        content=config_service.sites_payload_json(),
+        media_type="application/json",
+        headers=_SITES_CACHE_HEADERS
+    )
 
 @router.post("/trigger/{site_id}")
-async def extract_urls(site_id: str):
+async def extract_urls(site_id: str, url_service: UrlService = Depends(get_url_service)):
     """Extracts URLs from a given site (or all)"""
-    # Validate site_id using existing config_service
-    if site_id != "all" and not config_service.site(site_id):
-        return { 
-            "error": f"Site {site_id} not found in configuration. If you would like to add it, please add to sites.yaml. See other site configuration or sites_example.yaml for reference." 
-        }
+    # Validate site_id against the cached site mapping (an O(1) key check)
+    sites = config_service.all_sites
+    if site_id != "all" and site_id not in sites:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Site {site_id} not found in configuration. If you would like to add it, please add to sites.yaml. See other site configuration or sites_example.yaml for reference."
+        )
 
-    # Initialize service
-    url_service = UrlService()
-    
     try:
         if site_id == "all":
-            # Process all sites using existing config_service
-            sites = config_service.all_sites
-            results = {}
-            for site_id in sites:
-                try:
-                    results[site_id] = await url_service.process_site(site_id)
-                except Exception as e:
-                    results[site_id] = {"error": str(e)}
-            return results
+            # Process all sites concurrently, streaming each result as it completes
+            return StreamingResponse(
+                _stream_site_results(list(sites), url_service),
+                media_type="application/x-ndjson"
+            )
         else:
-            # Process single site
+            # Process single site; the result is encoded straight to bytes, skipping
+            # FastAPI's jsonable_encoder walk over every URL in it
             result = await url_service.process_site(site_id)
-            return result
+            return Response(content=orjson.dumps(result), media_type="application/json")
             
     except Exception as e:
-        return {"error": f"Processing failed: {str(e)}"}
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+async def _stream_site_results(site_ids: List[str], url_service: UrlService) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per site ({"site", "result"}) as soon as that site finishes."""
+    semaphore = asyncio.Semaphore(config_service.max_concurrent_sites)
+
+    async def process(site_id: str):
+        async with semaphore:
+            try:
+                return site_id, await url_service.process_site(site_id)
+            except Exception as e:
+                return site_id, {"error": str(e)}
+
+    tasks = [asyncio.create_task(process(site_id)) for site_id in site_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            site_id, result = await next_done
+            yield orjson.dumps({"site": site_id, "result": result}) + b"\n"
+    finally:
+        # stop remaining sites if the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
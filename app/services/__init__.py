@@ -9,9 +9,32 @@
 # Imports
 # ==============================================================================
 
-from .url_service import UrlService, OnboardingUrlService
+import importlib
+
+# config_service shares its submodule's name, so it is bound eagerly; it is
+# also imported by the clients, which the URL services in turn depend on
 from .config_service import config_service
 
+# the URL services pull in every client, so they load on first access (PEP 562)
+_LAZY_IMPORTS = {
+    "UrlService": ".url_service",
+    "OnboardingUrlService": ".url_service",
+}
+
+
+def __getattr__(name: str):
+    """Import a public name on first access and cache it on the package."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 # ==============================================================================
 # Public exports
 # ==============================================================================
@@ -1,26 +1,91 @@
+from functools import cached_property, lru_cache
 from pathlib import Path
+import orjson
 import yaml
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 from app.models.config_models import SiteConfig, SiteUpdate, SitesConfig
 from app.models.url_models import OnboardingResult
+from app.utils.file_utils import atomic_write
+
+# libyaml-backed loader and dumper when PyYAML was built with it, pure Python otherwise
+try:
+    from yaml import CSafeDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    from yaml import SafeLoader as _YamlLoader
+
+# JSON copy of a parsed YAML config, written next to it (sites.yaml.cache.json)
+_SIDECAR_SUFFIX = ".cache.json"
+
+# project files, resolved once at import
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+_ENV_PATH = _PROJECT_ROOT / ".env"
+_SITES_PATH = _PROJECT_ROOT / "config" / "sites.yaml"
+_SITES_SIDECAR_PATH = Path(str(_SITES_PATH) + _SIDECAR_SUFFIX)
+
+
+@lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML mapping once per (path, modification time, size); edits change the key"""
+    sidecar = Path(path + _SIDECAR_SUFFIX)
+
+    # a JSON copy built from exactly this YAML (same stamp) skips the YAML parse altogether;
+    # comparing stamps rather than ages also catches a YAML restored with an older mtime
+    try:
+        cached = orjson.loads(sidecar.read_bytes())
+        if (
+            isinstance(cached, dict)
+            and cached.get("source") == [mtime_ns, size]
+            and isinstance(cached.get("config"), dict)
+        ):
+            return cached["config"]
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+    with open(path, "r", encoding="utf-8") as file:
+        raw_config = yaml.load(file, Loader=_YamlLoader)
+
+    if not isinstance(raw_config, dict):
+        raise ValueError("Invalid configuration format")
+
+    _write_sidecar(sidecar, raw_config, (mtime_ns, size))
+
+    return raw_config
+
+
+def _write_sidecar(sidecar: Path, raw_config: dict, source_stamp: Tuple[int, int]) -> None:
+    """Best-effort JSON copy of a parsed config, tagged with the stamp of the YAML it came from;
+    a read-only deployment just keeps parsing YAML"""
+    try:
+        atomic_write(sidecar, orjson.dumps({"source": list(source_stamp), "config": raw_config}))
+    except (OSError, TypeError):
+        pass
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    """(modification time, size) of a file; changes whenever its content does"""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
 
 class ConfigService:
     """Service for loading and managing application configuration"""
     
     def __init__(self):
         self._sites_config: Optional[SitesConfig] = None
+        self._sites_stamp: Optional[Tuple[int, int]] = None
+        self._sites_payload: Optional[bytes] = None
+        # .env is read on the first env_var() call, not at import time
         self._env_loaded = False
-        self._load_environment()
     
     def _load_environment(self):
         """Load environment variables from .env file"""
         if not self._env_loaded:
-            env_path = Path(__file__).parent.parent.parent / ".env"
-
-            if env_path.exists():
-                load_dotenv(env_path)
+            if _ENV_PATH.exists():
+                load_dotenv(_ENV_PATH)
             else:
                 load_dotenv()
 
@@ -28,6 +93,7 @@ class ConfigService:
 
     def env_var(self, key: str, default: Optional[str] = None, required: bool = False) -> str:
         """Get environment variable with validation"""
+        self._load_environment()
         value = os.getenv(key, default)
 
         if required and not value:
@@ -35,79 +101,110 @@ class ConfigService:
 
         return value
 
-    @property
+    def reload_env(self) -> None:
+        """Forget settings read so far, so the next access sees the current environment"""
+        for name, attribute in vars(type(self)).items():
+            if isinstance(attribute, cached_property):
+                self.__dict__.pop(name, None)
+
+    # settings are read from the environment once, on first access
+
+    @cached_property
     def firecrawl_api_key(self) -> str:
         """Get Firecrawl API key from environment"""
         return self.env_var("FIRECRAWL_API_KEY", required=True)
 
-    @property
+    @cached_property
     def get_openai_api_key(self) -> str:
         """Get OpenAI API key from environment"""
         return self.env_var("OPENAI_API_KEY", required=True)
 
-    @property
+    @cached_property
     def log_level(self) -> str:
         """Log level from environment"""
         return self.env_var("LOG_LEVEL", default="INFO")
 
-    @property
+    @cached_property
     def environment(self) -> str:
         """Current environment (development, production, etc.)"""
         return self.env_var("ENVIRONMENT", default="development")
 
-    @property
+    @cached_property
     def firecrawl_rate_limit_delay(self) -> int:
         """Delay between Firecrawl requests to respect rate limits (in seconds)"""
         return int(self.env_var("FIRECRAWL_RATE_LIMIT_DELAY", default="6"))
 
-    @property
+    @cached_property
     def firecrawl_adaptive_rate_limit(self) -> bool:
         """Whether to use adaptive rate limiting (recommended: True)"""
         return self.env_var("FIRECRAWL_ADAPTIVE_RATE_LIMIT", default="True").lower() == "true"
 
-    @property
+    @cached_property
     def firecrawl_min_delay(self) -> float:
         """Minimum delay between requests in seconds (for adaptive rate limiting)"""
         return float(self.env_var("FIRECRAWL_MIN_DELAY", default="1.0"))
 
-    @property
+    @cached_property
     def firecrawl_max_delay(self) -> float:
         """Maximum delay between requests in seconds (for adaptive rate limiting)"""
         return float(self.env_var("FIRECRAWL_MAX_DELAY", default="10.0"))
 
-    @property
+    @cached_property
     def firecrawl_batch_size(self) -> int:
         """Number of URLs to process in each batch (for adaptive rate limiting)"""
         return int(self.env_var("FIRECRAWL_BATCH_SIZE", default="3"))
 
-    @property
+    @cached_property
     def firecrawl_rate_limit_window(self) -> int:
         """Time window in seconds to track rate limit responses (for adaptive rate limiting)"""
         return int(self.env_var("FIRECRAWL_RATE_LIMIT_WINDOW", default="60"))
 
+    @cached_property
+    def firecrawl_timeout_ms(self) -> int:
+        """Per-page timeout for Firecrawl batch scrapes (in milliseconds)"""
+        return int(self.env_var("FIRECRAWL_TIMEOUT_MS", default="30000"))
+
+    @cached_property
+    def firecrawl_requests_per_minute(self) -> int:
+        """Client-side cap on Firecrawl requests per minute"""
+        return int(self.env_var("FIRECRAWL_REQUESTS_PER_MINUTE", default="100"))
+
+    @cached_property
+    def openai_requests_per_minute(self) -> int:
+        """Client-side cap on OpenAI requests per minute (match your account tier)"""
+        return int(self.env_var("OPENAI_REQUESTS_PER_MINUTE", default="500"))
+
+    @cached_property
+    def openai_tokens_per_minute(self) -> int:
+        """Client-side cap on OpenAI prompt tokens per minute (match your account tier)"""
+        return int(self.env_var("OPENAI_TOKENS_PER_MINUTE", default="200000"))
+
+    @cached_property
+    def max_concurrent_sites(self) -> int:
+        """Sites processed at once by /trigger/all (lower it if site processing runs out of memory)"""
+        return int(self.env_var("MAX_CONCURRENT_SITES", default="4"))
+
     def load_sites_config(self) -> SitesConfig:
         """Loads the sites configuration from sites.yaml"""
-        if self._sites_config is not None:
-            return self._sites_config
-            
-        config_path = Path(__file__).parent.parent.parent / "config" / "sites.yaml"
-
-        if not config_path.exists():
-            raise FileNotFoundError(f"Configuration file not found at {config_path}")
+        try:
+            stamp = _file_stamp(_SITES_PATH)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found at {_SITES_PATH}")
 
-        with open(config_path, "r", encoding="utf-8") as file:
-            try:
-                raw_config = yaml.safe_load(file)
-                
-                if not isinstance(raw_config, dict):
-                    raise ValueError("Invalid configuration format")
+        # a stat per call keeps edits made outside this process visible
+        if self._sites_config is not None and stamp == self._sites_stamp:
+            return self._sites_config
 
-                self._sites_config = SitesConfig(**raw_config)
+        try:
+            raw_config = _load_yaml(str(_SITES_PATH), *stamp)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Error parsing configuration: {e}")
 
-                return self._sites_config
+        self._sites_config = SitesConfig(**raw_config)
+        self._sites_stamp = stamp
+        self._sites_payload = None
 
-            except yaml.YAMLError as e:
-                raise ValueError(f"Error parsing configuration: {e}")
+        return self._sites_config
     
     @property
     def all_sites(self) -> Dict[str, SitesConfig]:
@@ -116,15 +213,34 @@ class ConfigService:
 
         return config.sites
     
+    def sites_payload_json(self) -> bytes:
+        """Serialized /sites listing, built once and rebuilt only after the config changes"""
+        sites = self.all_sites  # drops a stale payload if sites.yaml changed
+
+        if self._sites_payload is None:
+            self._sites_payload = orjson.dumps({
+                site_id: {
+                    "name": site_info.name,
+                    "url": site_info.url,
+                    "sitemap_url": site_info.sitemap_url,
+                    "is_sitemap_index": site_info.is_sitemap_index
+                }
+                for site_id, site_info in sites.items()
+            })
+
+        return self._sites_payload
+
     def site(self, site_id: str) -> Optional[SiteConfig]:
         """Get a specific site by ID"""
-        return self.all_sites.get(site_id)
+        # straight to the sites mapping; load_sites_config is a stat when nothing changed
+        return self.load_sites_config().sites.get(site_id)
 
     def update_site_config(self, site_id: str, updates: SiteUpdate) -> None:
         """update site configuration and save to sites.yaml"""
         config = self.load_sites_config()
+        is_new_site = site_id not in config.sites
 
-        if site_id not in config.sites:
+        if is_new_site:
             # create a new site if it doesn't exist
             config.sites[site_id] = SiteConfig(
                 name=updates.name or f"Site {site_id}",
@@ -135,26 +251,36 @@ class ConfigService:
         # update the site configuration
         current_site = config.sites[site_id]
 
-        # update only the fields that are provided
-        update_data = updates.model_dump(exclude_unset=True)
+        # update only the fields that are provided, copying the one site
+        # instead of re-validating it field by field
+        update_data = {
+            field: value
+            for field, value in updates.model_dump(exclude_unset=True).items()
+            if field in SiteConfig.model_fields
+        }
+        updated_site = current_site.model_copy(update=update_data)
 
-        
-        for field, value in update_data.items():
-            if hasattr(current_site, field):
-                setattr(current_site, field, value)
+        # nothing changed: leave sites.yaml (and every cache keyed on it) untouched
+        if not is_new_site and updated_site == current_site:
+            return
 
-        # save back to file
-        config_path = Path(__file__).parent.parent.parent / "config" / "sites.yaml"
-        
-        # Convert to basic Python types for safe YAML serialization
-        safe_config = config.model_dump(mode='json')
+        config.sites[site_id] = updated_site
 
-        
-        with open(config_path, "w", encoding="utf-8") as file:
-            yaml.dump(safe_config, file, default_flow_style=False, indent=2)
+        # save back to file, converting to basic Python types for safe YAML serialization
+        safe_config = config.model_dump(mode='json')
 
-        # clear cache to force reload
-        self._sites_config = None
+        atomic_write(
+            _SITES_PATH,
+            yaml.dump(safe_config, Dumper=_YamlDumper, default_flow_style=False, indent=2).encode("utf-8")
+        )
+        sites_stamp = _file_stamp(_SITES_PATH)
+        _write_sidecar(_SITES_SIDECAR_PATH, safe_config, sites_stamp)
+
+        # the in-memory config already matches what was written, so keep it
+        # and record the new file stamp instead of re-parsing on the next read
+        self._sites_config = config
+        self._sites_stamp = sites_stamp
+        self._sites_payload = None
 
     def mark_site_onboarded(self, site_id: str, onboarding_result: OnboardingResult) -> None:
         """Mark a site as onboarded with the onboarding results"""
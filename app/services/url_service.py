@@ -11,9 +11,15 @@
 
 # Standard Library -----
 import asyncio
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 
 # Astral AI ----
 from app.models.url_models import (
@@ -29,7 +35,7 @@ from app.models.url_models import (
     UrlJudgeRequest
 )
 from app.models.config_models import SiteConfig, SiteStatus
-from app.clients.firecrawl_client import FirecrawlClient
+from app.clients.firecrawl_client import FirecrawlClient, FirecrawlRateLimited
 from app.clients.openai_client import OpenAIClient
 from app.crawler.sitemap_crawler import SitemapCrawler
 from app.services.config_service import config_service
@@ -40,13 +46,18 @@ from app.utils.url_utils import (
     filter_resolved_duplicates
 )
 from app.utils.json_writer import JsonWriter
+from app.utils.rate_limiter import gather_with_concurrency
 from app.ai.config import AIConfig
+from app.ai.hub_classifier import hub_classifier
+from app.ai.prompt_cache import PromptCache, prompt_cache
 
 # ==============================================================================
 # Public exports
 # ==============================================================================
 __all__ = ["UrlService", "OnboardingUrlService"]
 
+logger = logging.getLogger(__name__)
+
 # ==============================================================================
 # Main Classes
 # ==============================================================================
@@ -54,6 +65,11 @@ __all__ = ["UrlService", "OnboardingUrlService"]
 class UrlService:
     """Main orchestration service for URL processing."""
     
+    # concurrent crawls in the per-URL fallback, overall and per host
+    # (the Firecrawl client's token bucket still caps the request rate)
+    _MAX_CONCURRENT_CRAWLS = 20
+    _MAX_CRAWLS_PER_HOST = 4
+    
     def __init__(self):
         self.json_writer = JsonWriter()
     
@@ -66,55 +82,50 @@ class UrlService:
         if not site_config:
             raise ValueError(f"Site {site_id} not found in configuration")
         
-        # Step 1: Get URLs from multiple sources concurrently
-        discovery_result = await self._get_urls_from_multiple_sources(site_config)
-        
-        # Step 2: Check if site needs onboarding
-        is_onboarded = config_service.is_site_onboarded(site_id)
+        # Step 1: Start getting URLs from multiple sources concurrently; the
+        # onboarding check below doesn't need the results, so it runs meanwhile
+        discovery_task = asyncio.create_task(self._get_urls_from_multiple_sources(site_config))
         
-        if not is_onboarded:
-            # Step 3a: Run onboarding process
-            onboarding_service = OnboardingUrlService()
-            top_urls = await onboarding_service.onboard_site(site_id, discovery_result.urls, site_config.name)
+        try:
+            # Step 2: Check if site needs onboarding
+            is_onboarded = config_service.is_site_onboarded(site_id)
             
-            # Step 3b: Get additional URLs from top URLs
-            additional_urls = await self._get_additional_urls_from_top_urls(top_urls)
-            print(f"🔍 Merging {len(discovery_result.urls)} existing URLs with {len(additional_urls)} additional URLs...")
-            all_url_infos = discovery_result.urls + additional_urls
-        else:
-            # Step 3: Get additional URLs from existing top URLs
-            top_urls = site_config.top_urls or []
-            additional_urls = await self._get_additional_urls_from_top_urls(top_urls)
-            print(f"🔍 Merging {len(discovery_result.urls)} existing URLs with {len(additional_urls)} additional URLs...")
-            all_url_infos = discovery_result.urls + additional_urls
+            if not is_onboarded:
+                # Step 3a: Run onboarding process
+                discovery_result = await discovery_task
+                onboarding_service = OnboardingUrlService()
+                top_urls = await onboarding_service.onboard_site(site_id, discovery_result.urls, site_config.name)
+                
+                # Step 3b: Get additional URLs from top URLs
+                additional_urls = await self._get_additional_urls_from_top_urls(top_urls)
+            else:
+                # Step 3: Get additional URLs from existing top URLs while discovery runs
+                top_urls = site_config.top_urls or []
+                additional_urls = await self._get_additional_urls_from_top_urls(top_urls)
+                discovery_result = await discovery_task
+        finally:
+            # stop discovery if anything above failed (a no-op once it has finished)
+            discovery_task.cancel()
+        
+        # Safety check: ensure all items are UrlInfo objects (every later step relies on it)
+        additional_urls = [url for url in additional_urls if isinstance(url, UrlInfo)]
+        
+        logger.info("Merging %d existing URLs with %d additional URLs", len(discovery_result.urls), len(additional_urls))
+        # one merge across both sets, so a crawled URL that discovery already found
+        # keeps a single entry carrying both detection methods
+        all_url_infos = merge_url_lists([discovery_result.urls, additional_urls])
         
         # Step 4: Create URL set with proper structure
-        print(f"🔍 Final URL set contains {len(all_url_infos)} total URLs")
-        
-        # Debug: Check the structure of all_url_infos
-        print(f"🔍 Debug: Type of all_url_infos: {type(all_url_infos)}")
-        if all_url_infos:
-            print(f"🔍 Debug: First item type: {type(all_url_infos[0])}")
-            print(f"🔍 Debug: First item: {all_url_infos[0]}")
-        
-        # Safety check: ensure all items are UrlInfo objects
-        all_url_infos = [url for url in all_url_infos if isinstance(url, UrlInfo)]
-        print(f"🔍 After safety check: {len(all_url_infos)} valid UrlInfo objects")
-        
-        # Show breakdown by detection method
-        method_counts = {}
-        for url_info in all_url_infos:
-            if hasattr(url_info, 'detection_methods'):
-                for method in url_info.detection_methods:
-                    method_counts[method.value] = method_counts.get(method.value, 0) + 1
-            else:
-                print(f"🔍 Warning: url_info {url_info} does not have detection_methods attribute")
-                print(f"🔍 Warning: url_info type: {type(url_info)}")
-                print(f"🔍 Warning: url_info dir: {dir(url_info)}")
+        logger.info("Final URL set contains %d total URLs", len(all_url_infos))
         
-        print("🔍 URL breakdown by detection method:")
-        for method, count in method_counts.items():
-            print(f"  - {method}: {count} URLs")
+        # Show breakdown by detection method (also feeds the summary below)
+        method_counts = Counter(
+            method.value
+            for url_info in all_url_infos
+            for method in url_info.detection_methods
+        )
+        
+        logger.info("URL breakdown by detection method: %s", dict(method_counts))
         
         url_set = UrlSet(
             site_id=site_id,
@@ -129,30 +140,24 @@ class UrlService:
         # Step 6: Create processing summary
         processing_time = (datetime.now() - start_time).total_seconds()
         
-        # Collect all detection methods safely
-        detection_methods_used = []
-        for url_info in all_url_infos:
-            if hasattr(url_info, 'detection_methods'):
-                for method in url_info.detection_methods:
-                    detection_methods_used.append(method.value)
-        
         summary = ProcessingSummary(
             status="completed",
             urls_found=len(all_url_infos),
             urls_processed=len(all_url_infos),
             processing_time_seconds=processing_time,
-            detection_methods_used=list(set(detection_methods_used))
+            detection_methods_used=list(method_counts)
         )
         
-        # Save the final processing summary with correct timing
-        self.json_writer.write_processing_summary(site_id, summary)
+        # Save the final processing summary with correct timing (off the event loop)
+        await asyncio.to_thread(self.json_writer.write_processing_summary, site_id, summary)
         
         return {
             "site_id": site_id,
             "site_name": site_config.name,
             "url_set": url_set.model_dump(),
             "processing_summary": summary.model_dump(),
-            "discovery_result": discovery_result.model_dump(),
+            # every discovered UrlInfo is already listed in url_set, so only the counts and metadata are repeated
+            "discovery_result": discovery_result.model_dump(exclude={"urls"}),
             "output_path": str(output_path),
             "onboarded": is_onboarded,
             "processing_time": datetime.now().isoformat()
@@ -176,7 +181,7 @@ class UrlService:
         successful_sources = 0
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                print(f"Error getting URLs from source {i}: {str(result)}")
+                logger.warning("Error getting URLs from source %d: %s", i, result)
                 url_lists.append([])
             else:
                 url_lists.append(result)
@@ -212,111 +217,151 @@ class UrlService:
         """Calls Firecrawl client to get URLs via SDK map endpoint."""
         async with FirecrawlClient() as client:
             urls = await client.map_site(site_config.url, include_subdomains=True)
-            return [create_url_info(url, DetectionMethod.FIRECRAWL_MAP) for url in urls]
+            detected_at = datetime.now()
+            return [create_url_info(url, DetectionMethod.FIRECRAWL_MAP, detected_at) for url in urls]
     
     async def _get_additional_urls_from_top_urls(self, top_urls: List[str]) -> List[UrlInfo]:
-        """Gets additional URLs by crawling the top URLs with Firecrawl SDK."""
+        """Gets additional URLs from the links on the top URLs with a Firecrawl batch scrape."""
         if not top_urls:
             return []
         
-        print(f"🔍 Starting to crawl {len(top_urls)} top URLs for additional URL discovery...")
-        all_discovered_urls = []
+        logger.info("Starting to scrape %d top URLs for additional URL discovery", len(top_urls))
         
+        async with FirecrawlClient() as client:
+            try:
+                # one batch job covers up to 100 top URLs instead of one crawl job each
+                discovered_urls, failed_urls = await client.batch_scrape_links(top_urls)
+            except Exception as e:
+                logger.warning("Batch scrape failed (%s), crawling top URLs one by one", e)
+                discovered_urls, failed_urls = [], top_urls
+            
+            # keying on the URL drops repeats as they are collected
+            detected_at = datetime.now()
+            discovered = {
+                url: create_url_info(url, DetectionMethod.FIRECRAWL_CRAWL, detected_at)
+                for url in discovered_urls
+            }
+            
+            # only the URLs of failed batch jobs are crawled one by one
+            if failed_urls:
+                logger.info("Crawling %d top URLs from failed batch scrapes one by one", len(failed_urls))
+                discovered.update(await self._crawl_top_urls_individually(client, failed_urls))
+        
+        if discovered:
+            logger.info("Total unique discovered URLs: %d", len(discovered))
+            return list(discovered.values())
+        
+        logger.info("No additional URLs discovered from top URLs")
+        return []
+    
+    async def _crawl_top_urls_individually(self, client: FirecrawlClient, top_urls: List[str]) -> Dict[str, UrlInfo]:
+        """Fallback discovery: crawls each top URL separately under the adaptive rate limiter."""
         # Import rate limiter
-        from app.utils.rate_limiter import create_rate_limiter_from_config, process_with_rate_limiting
+        from app.utils.rate_limiter import create_rate_limiter_from_config
         
         # Create adaptive rate limiter
         rate_limiter = create_rate_limiter_from_config(config_service)
         
-        async with FirecrawlClient() as client:
-            # Define the processor function for each URL
-            async def process_single_url(url: str):
-                try:
-                    print(f"🔍 Crawling URL: {url}")
-                    
-                    # Crawl single URL with Firecrawl
-                    discovered_urls = await client.crawl_single_url(url, max_depth=2, limit=2)
-                    
-                    if discovered_urls:
-                        # Filter out any None or invalid URLs before creating UrlInfo objects
-                        valid_urls = [url for url in discovered_urls if url and isinstance(url, str) and url.strip()]
-                        if valid_urls:
-                            # Convert to UrlInfo objects
-                            url_infos = [create_url_info(valid_url, DetectionMethod.FIRECRAWL_CRAWL) for valid_url in valid_urls]
-                            print(f"🔍 Discovered {len(valid_urls)} valid URLs from {url}")
-                            return url_infos
-                        else:
-                            print(f"🔍 No valid URLs discovered from {url}")
-                            return []
-                    else:
-                        print(f"🔍 No new URLs discovered from {url}")
-                        return []
-                        
-                except Exception as e:
-                    print(f"Error crawling {url}: {str(e)}")
-                    # Check if it's a rate limit error
-                    is_rate_limit = "429" in str(e) or "rate limit" in str(e).lower()
-                    rate_limiter.record_event(success=False, is_rate_limit=is_rate_limit)
-                    raise e
-            
-            # Process URLs with adaptive rate limiting
-            batch_size = config_service.firecrawl_batch_size
-            results = await process_with_rate_limiting(
-                top_urls, 
-                process_single_url, 
-                rate_limiter, 
-                batch_size
-            )
-            
-            # Collect all discovered URLs
-            for i, result in enumerate(results):
-                print(f"🔍 Debug: Processing result {i}: {type(result)} - {result}")
-                if result and isinstance(result, list):
-                    print(f"🔍 Debug: Extending with list of {len(result)} items")
-                    all_discovered_urls.extend(result)
-                elif result is not None:
-                    # Single result case
-                    print(f"🔍 Debug: Appending single result: {type(result)}")
-                    all_discovered_urls.append(result)
+        # Top URLs usually share one host, so that host is never crawled more than
+        # _MAX_CRAWLS_PER_HOST at a time, while other hosts proceed in parallel
+        host_limits: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self._MAX_CRAWLS_PER_HOST)
+        )
+        
+        # crawls still start one adaptive delay apart, as they did in sequential batches
+        pacing = asyncio.Lock()
+        
+        # Define the processor function for each URL
+        async def process_single_url(url: str):
+            try:
+                logger.debug("Crawling URL: %s", url)
+                
+                # Crawl single URL with Firecrawl
+                discovered_urls = await client.crawl_single_url(url, max_depth=2, limit=2)
+                
+                if discovered_urls:
+                    # crawl_single_url already returns stripped http(s) URLs only;
+                    # keying on the URL drops repeats before they leave this crawl
+                    detected_at = datetime.now()
+                    url_infos = {
+                        valid_url: create_url_info(valid_url, DetectionMethod.FIRECRAWL_CRAWL, detected_at)
+                        for valid_url in discovered_urls
+                    }
+                    logger.debug("Discovered %d valid URLs from %s", len(url_infos), url)
+                    return url_infos
                 else:
-                    print(f"🔍 Debug: Skipping None result")
-            
-            # Safety check: filter out any None values that might have slipped through
-            all_discovered_urls = [url for url in all_discovered_urls if url is not None]
-            
-            # Safety check: ensure all items are UrlInfo objects
-            all_discovered_urls = [url for url in all_discovered_urls if isinstance(url, UrlInfo)]
-            
-            # Print rate limiter stats
-            stats = rate_limiter.get_stats()
-            print(f"🔍 Rate limiter stats: {stats}")
-        
-        # Remove duplicates and return unique URLs
-        if all_discovered_urls:
-            print(f"🔍 Total discovered URLs before deduplication: {len(all_discovered_urls)}")
-            # Debug: Check the structure of all_discovered_urls
-            print(f"🔍 Debug: Type of all_discovered_urls: {type(all_discovered_urls)}")
-            if all_discovered_urls:
-                print(f"🔍 Debug: First item type: {type(all_discovered_urls[0])}")
-                print(f"🔍 Debug: First item: {all_discovered_urls[0]}")
-            # Since all_discovered_urls is already a list of UrlInfo objects, just return it
-            # The merge_url_lists function expects a list of lists, but we have a single list
-            print(f"🔍 Total unique discovered URLs after deduplication: {len(all_discovered_urls)}")
-            return all_discovered_urls
-        
-        print("🔍 No additional URLs discovered from top URLs")
-        return []
+                    logger.debug("No new URLs discovered from %s", url)
+                    return {}
+                    
+            except FirecrawlRateLimited:
+                # still rate limited after the client's own retries
+                rate_limiter.record_event(success=False, is_rate_limit=True)
+                raise
+            except Exception as e:
+                logger.warning("Error crawling %s: %s", url, e)
+                rate_limiter.record_event(success=False, is_rate_limit=False)
+                raise
+        
+        async def crawl_with_limits(url: str):
+            async with host_limits[urlsplit(url).netloc]:
+                async with pacing:
+                    await rate_limiter.wait_if_needed()
+                try:
+                    result = await process_single_url(url)
+                except Exception:
+                    return None  # already logged and recorded as a failure
+                rate_limiter.record_event(success=True)
+                return result
+        
+        # Process URLs with per-host and adaptive rate limiting
+        results = await gather_with_concurrency(
+            top_urls,
+            crawl_with_limits,
+            self._MAX_CONCURRENT_CRAWLS
+        )
+        
+        # Fold each crawl's URLs into one mapping; failed URLs come back as None
+        discovered: Dict[str, UrlInfo] = {}
+        for result in results:
+            if result:
+                discovered.update(result)
+        
+        # Print rate limiter stats
+        stats = rate_limiter.get_stats()
+        logger.debug("Rate limiter stats: %s", stats)
+        
+        return discovered
     
     async def _save_url_set(self, url_set: UrlSet) -> Path:
         """Save URL set to timestamped directory."""
-        # Save URL set using JsonWriter
-        output_path = self.json_writer.write_url_set(url_set.site_id, url_set.urls)
+        # Save URL set using JsonWriter; serializing and writing a large set runs in a
+        # worker thread so concurrent site crawls keep running meanwhile
+        output_path = await asyncio.to_thread(self.json_writer.write_url_set, url_set.site_id, url_set.urls)
         
         return output_path.parent
 
 class OnboardingUrlService:
     """Service for handling site onboarding process."""
     
+    # URL heuristics for _looks_like_content_hub, compiled once; each substring
+    # list becomes a single alternation so a URL is scanned once per list
+    _HUB_SUBSTRING_PATTERN = re.compile("|".join(map(re.escape, (
+        '/news/', '/blog/', '/press-releases/', '/judgments/',
+        '/articles/', '/publications/', '/reports/', '/updates/',
+        '/announcements/', '/media/', '/resources/', '/services/',
+        '/council-', '/council_', '/government-', '/government_'
+    ))))
+    _ARTICLE_SUBSTRING_PATTERN = re.compile("|".join(map(re.escape, (
+        '/news/20', '/blog/20', '/press-releases/20',  # Date patterns
+        '.html', '.htm', '.php', '.aspx'  # File extensions
+    ))))
+    _DATE_SEGMENT_PATTERN = re.compile(r'/\d{4}(?:/\d{2})?')
+    _FILE_EXTENSION_PATTERN = re.compile(r'\.(html?|php|aspx?|jsp|asp)$')
+    _ARTICLE_ENDINGS = ('article', 'post', 'story', 'news', 'press-release')
+    
+    # replacement candidates resolved per round, per missing top URL
+    _REPLACEMENT_PREFETCH_FACTOR = 3
+    
     def __init__(self):
         # Access the global config_service instance
         from app.services.config_service import config_service
@@ -324,57 +369,107 @@ class OnboardingUrlService:
     
     async def onboard_site(self, site_id: str, url_infos: List[UrlInfo], site_name: str) -> List[str]:
         """Complete onboarding process for a site."""
-        print(f"🚀 Starting onboarding process for {site_id} ({site_name})...")
+        logger.info("Starting onboarding process for %s (%s)", site_id, site_name)
         
         # Extract URLs for AI analysis
         urls = [url_info.url for url_info in url_infos]
-        print(f"🔍 Extracted {len(urls)} URLs for AI analysis")
-        
-        # Step 1: Run 3 concurrent AI analyses
-        print(f"🤖 Running AI analysis on {len(urls)} URLs...")
-        ai_suggestions = await self._run_ai_analysis(urls, site_name)
-        print(f"🤖 AI analysis complete. Got {len(ai_suggestions)} suggestions")
+        logger.debug("Extracted %d URLs for AI analysis", len(urls))
+        
+        # Steps 1-2: Reuse the cached AI selection for an identical or near-identical URL set;
+        # hashing the URLs and the cache file I/O run in a worker thread so other sites
+        # keep processing meanwhile
+        model = AIConfig.MODELS["url_judge"]
+        cache_scope = PromptCache.make_scope(model, AIConfig.PROMPT_VERSION, site_name)
+        cache_key, url_sketch, cached_selection = await asyncio.to_thread(
+            self._lookup_cached_selection, model, cache_scope, site_name, urls
+        )
         
-        # Step 2: Run AI judge to select best 5
-        print(f"👨‍⚖️ Running AI judge to select best 5 URLs...")
-        top_urls = await self._run_ai_judge(ai_suggestions, site_name)
-        print(f"👨‍⚖️ AI judge selected {len(top_urls)} URLs: {top_urls}")
+        if cached_selection is not None:
+            top_urls = cached_selection["urls"]
+            logger.info("Reusing cached AI selection: %s", top_urls)
+        else:
+            top_urls = await self._run_ai_selection(urls, site_name)
+            await asyncio.to_thread(prompt_cache.set, cache_key, {"urls": top_urls}, cache_scope, url_sketch)
         
         # Step 3: Validate unique resolutions and filter content hubs
-        print(f"🔍 Validating and filtering URLs...")
+        logger.debug("Validating and filtering URLs")
         validated_urls = await self._validate_and_filter_urls(top_urls, urls)
-        print(f"🔍 Validation complete. Final URLs: {validated_urls}")
+        logger.info("Validation complete. Final URLs: %s", validated_urls)
         
         # Step 4: Save onboarding results using existing config_service
-        print(f"💾 Saving onboarding results...")
+        logger.debug("Saving onboarding results")
         await self._save_onboarding_results(site_id, validated_urls, len(urls))
         
-        print(f"✅ Onboarding process complete for {site_id}")
+        logger.info("Onboarding process complete for %s", site_id)
         return validated_urls
     
-    async def _run_ai_analysis(self, urls: List[str], site_name: str) -> List[OutputURLsWithInfo]:
-        """Orchestrates 3 concurrent AI analyses."""
-        # Create request object
-        request = UrlAnalysisRequest(urls=urls, site_name=site_name)
-        
-        # Build prompt once
-        prompt = AIConfig.build_analysis_prompt(request)
+    @staticmethod
+    def _lookup_cached_selection(
+        model: str, cache_scope: str, site_name: str, urls: List[str]
+    ) -> Tuple[str, List[int], Optional[Dict[str, Any]]]:
+        """Blocking prompt cache lookup: (cache key, URL sketch, cached selection or None)."""
+        cache_key = PromptCache.make_key(model, AIConfig.PROMPT_VERSION, site_name, urls)
+        cached_selection = prompt_cache.get(cache_key)
+        url_sketch = prompt_cache.make_sketch(urls)
+        if cached_selection is None:
+            cached_selection = prompt_cache.get_similar(cache_scope, url_sketch)
+        return cache_key, url_sketch, cached_selection
+    
+    async def _run_ai_selection(self, urls: List[str], site_name: str) -> List[str]:
+        """Runs the AI analyses and the AI judge to pick the top URLs."""
+        # Step 1: Run 3 concurrent AI analyses
+        logger.info("Running AI analysis on %d URLs", len(urls))
+        ai_suggestions = await self._run_ai_analysis(urls, site_name)
+        logger.info("AI analysis complete. Got %d suggestions", len(ai_suggestions))
         
-        # Create 3 concurrent tasks
-        tasks = [
-            self._run_single_ai_analysis(request, prompt)
-            for _ in range(3)
-        ]
+        # Step 2: Run AI judge to select best 5
+        logger.debug("Running AI judge to select best 5 URLs")
+        top_urls = await self._run_ai_judge(ai_suggestions, site_name)
+        logger.info("AI judge selected %d URLs: %s", len(top_urls), top_urls)
         
-        # Execute concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return top_urls
+    
+    async def _run_ai_analysis(self, urls: List[str], site_name: str) -> List[OutputURLsWithInfo]:
+        """Orchestrates concurrent AI analyses across all token-budgeted URL batches."""
+        # Drop obvious static pages locally so the LLM only sees hub candidates
+        candidate_urls = AIConfig.prefilter_urls(urls)
+        logger.debug("Pre-filtered %d URLs to %d hub candidates", len(urls), len(candidate_urls))
+        
+        # Rank locally and keep only the strongest candidates for the LLM
+        if len(candidate_urls) > AIConfig.MAX_ANALYSIS_URLS:
+            candidate_urls = hub_classifier.rank_urls(candidate_urls, AIConfig.MAX_ANALYSIS_URLS)
+            logger.debug("Kept top %d candidates by local hub score", len(candidate_urls))
+        
+        # Pack URLs into as few batches as the token budget allows
+        url_batches = AIConfig.pack_batches(candidate_urls)
+        logger.debug("Packed %d URLs into %d batch(es)", len(candidate_urls), len(url_batches))
+        
+        # every batch request repeats the site name, so keep a single copy
+        site_name = sys.intern(site_name)
+        
+        # Build each batch's request and prompt once, shared by its analyses;
+        # jobs are produced as the fan-out consumes them, with no per-batch list
+        def analysis_jobs():
+            for url_batch in url_batches:
+                request = UrlAnalysisRequest(urls=url_batch, site_name=site_name)
+                batch_prompt = (request, AIConfig.build_analysis_prompt(request))
+                for _ in range(AIConfig.ANALYSES_PER_BATCH):
+                    yield batch_prompt
+        
+        # Run every analysis of every batch concurrently, bounded by the request cap
+        results = await gather_with_concurrency(
+            analysis_jobs(),
+            lambda job: self._run_single_ai_analysis(*job),
+            AIConfig.MAX_CONCURRENT_REQUESTS
+        )
         
-        # Extract results
+        # Extract results; failed analyses share one placeholder timestamp
         suggestions = []
+        failed_at = datetime.now()
         for result in results:
             if isinstance(result, Exception):
-                print(f"AI analysis failed: {str(result)}")
-                suggestions.append(OutputURLsWithInfo(urls=[], total_count=0, timestamp=datetime.now()))
+                logger.warning("AI analysis failed: %s", result)
+                suggestions.append(OutputURLsWithInfo(urls=[], total_count=0, timestamp=failed_at))
             else:
                 suggestions.append(result)
         
@@ -411,93 +506,74 @@ class OnboardingUrlService:
     async def _validate_and_filter_urls(self, top_urls: List[str], all_urls: List[str]) -> List[str]:
         """Ensure URLs don't resolve to the same page and are content discovery hubs."""
         
-        print(f"🔍 Validating and filtering {len(top_urls)} top URLs...")
+        logger.debug("Validating and filtering %d top URLs", len(top_urls))
         
         # Filter out URLs that look like individual articles
         filtered_urls = []
         for url in top_urls:
             if self._looks_like_content_hub(url):
                 filtered_urls.append(url)
-                print(f"✅ {url} - passed content hub validation")
+                logger.debug("%s - passed content hub validation", url)
             else:
-                print(f"❌ {url} - failed content hub validation")
+                logger.debug("%s - failed content hub validation", url)
         
-        print(f"🔍 After content hub filtering: {len(filtered_urls)} URLs")
+        logger.debug("After content hub filtering: %d URLs", len(filtered_urls))
         
         # If we don't have enough, try to find more from remaining URLs
-        while len(filtered_urls) < 5 and all_urls:
-            remaining = [url for url in all_urls if url not in filtered_urls]
-            if not remaining:
-                break
-                
-            for url in remaining:
-                if self._looks_like_content_hub(url):
+        # (one ordered pass, with a set for the already-chosen check)
+        if len(filtered_urls) < 5:
+            chosen = set(filtered_urls)
+            for url in all_urls:
+                if url not in chosen and self._looks_like_content_hub(url):
                     filtered_urls.append(url)
-                    print(f"➕ Added replacement URL: {url}")
-                    break
-            else:
-                break
+                    chosen.add(url)
+                    logger.debug("Added replacement URL: %s", url)
+                    if len(filtered_urls) == 5:
+                        break
         
         # Ensure we don't exceed 5 URLs
         filtered_urls = filtered_urls[:5]
-        print(f"🔍 Final filtered URLs before resolution validation: {len(filtered_urls)}")
+        logger.debug("Final filtered URLs before resolution validation: %d", len(filtered_urls))
         
         # Validate unique resolutions
         if len(filtered_urls) > 1:
-            print(f"🔍 Running resolution validation on {len(filtered_urls)} URLs...")
+            logger.debug("Running resolution validation on %d URLs", len(filtered_urls))
             validated_urls = await self._validate_unique_resolutions(filtered_urls, all_urls)
-            print(f"🔍 After resolution validation: {len(validated_urls)} URLs")
+            logger.debug("After resolution validation: %d URLs", len(validated_urls))
             return validated_urls
         
-        print(f"🔍 Skipping resolution validation (only {len(filtered_urls)} URLs)")
+        logger.debug("Skipping resolution validation (only %d URLs)", len(filtered_urls))
         return filtered_urls
     
     def _looks_like_content_hub(self, url: str) -> bool:
         """Check if URL looks like a content discovery hub rather than individual article."""
-
-        
-        # Look for patterns that suggest content hubs
-        hub_patterns = [
-            '/news/', '/blog/', '/press-releases/', '/judgments/',
-            '/articles/', '/publications/', '/reports/', '/updates/',
-            '/announcements/', '/media/', '/resources/', '/services/',
-            '/council-', '/council_', '/government-', '/government_'
-        ]
-        
-        # Look for patterns that suggest individual articles
-        article_patterns = [
-            '/news/20', '/blog/20', '/press-releases/20',  # Date patterns
-            '.html', '.htm', '.php', '.aspx'  # File extensions
-        ]
+        lowered = url.lower()
         
         # Check if it's likely a hub
-        is_hub = any(pattern in url.lower() for pattern in hub_patterns)
+        is_hub = self._HUB_SUBSTRING_PATTERN.search(lowered) is not None
         
         # Check if it's likely an individual article
-        is_article = any(pattern in url.lower() for pattern in article_patterns)
+        is_article = self._ARTICLE_SUBSTRING_PATTERN.search(lowered) is not None
         
         # Check URL depth - shallow URLs are more likely to be hubs
-        url_depth = len([part for part in url.split('/') if part])
+        path_parts = [part for part in url.split('/') if part]
+        url_depth = len(path_parts)
         
         # Additional checks for individual articles
         # URLs with dates in them are likely articles
-        import re
-        has_date = re.search(r'/\d{4}(?:/\d{2})?', url)
+        has_date = self._DATE_SEGMENT_PATTERN.search(url)
         
         # URLs with long path segments (likely titles) are probably articles
-        path_parts = [part for part in url.split('/') if part]
         has_long_segments = any(len(part) > 30 for part in path_parts)  # Increased threshold
         
         # URLs ending with specific words that suggest articles
-        article_endings = ['article', 'post', 'story', 'news', 'press-release']
-        ends_with_article = any(url.lower().endswith(ending) for ending in article_endings)
+        ends_with_article = lowered.endswith(self._ARTICLE_ENDINGS)
         
         # URLs with file extensions are likely articles
-        has_file_extension = re.search(r'\.(html?|php|aspx?|jsp|asp)$', url.lower())
+        has_file_extension = self._FILE_EXTENSION_PATTERN.search(lowered)
         
         # Check for excessive hyphens/underscores that suggest article titles
         # But be more lenient - government URLs often use hyphens for readability
-        path_parts = [part for part in url.split('/') if part]
         excessive_separators = any(
             len(part.split('-')) > 4 or len(part.split('_')) > 4 
             for part in path_parts
@@ -538,32 +614,38 @@ class OnboardingUrlService:
         
         # Remove duplicates and find replacements
         unique_urls = dedup_result.unique_urls
-        remaining_urls = [url for url in all_urls if url not in top_urls]
+        taken_resolutions = {resolved_mapping[url] for url in unique_urls}
         
-        # Try to find replacements for duplicates
-        while len(unique_urls) < 5 and remaining_urls:
-            # Take next URL from remaining
-            replacement_url = remaining_urls.pop(0)
-            
-            # Check if it looks like a content hub
-            if not self._looks_like_content_hub(replacement_url):
-                continue
-            
-            # Resolve it
-            replacement_resolution = await resolve_urls([replacement_url])
-            replacement_resolved = replacement_resolution.mappings[replacement_url].resolved_url
+        # Replacement candidates: remaining URLs that look like content hubs, in order
+        top_url_set = set(top_urls)
+        candidates = (
+            url for url in all_urls
+            if url not in top_url_set and self._looks_like_content_hub(url)
+        )
+        
+        # Resolve candidates a window at a time (concurrently within a window)
+        # until the duplicates are replaced or the candidates run out
+        while len(unique_urls) < 5:
+            window = list(islice(candidates, (5 - len(unique_urls)) * self._REPLACEMENT_PREFETCH_FACTOR))
+            if not window:
+                break
             
-            # Check if it's unique
-            if replacement_resolved not in [resolved_mapping[url] for url in unique_urls]:
-                unique_urls.append(replacement_url)
+            window_resolution = await resolve_urls(window)
+            for replacement_url in window:
+                replacement_resolved = window_resolution.mappings[replacement_url].resolved_url
+                
+                # Check if it's unique
+                if replacement_resolved not in taken_resolutions:
+                    unique_urls.append(replacement_url)
+                    taken_resolutions.add(replacement_resolved)
+                    if len(unique_urls) == 5:
+                        break
         
         return unique_urls[:5]  # Ensure we don't exceed 5
     
     async def _save_onboarding_results(self, site_id: str, top_urls: List[str], total_analyzed: int):
         """Save onboarding results using existing config_service."""
-        print(f"💾 Saving onboarding results for {site_id}...")
-        print(f"💾 Top URLs to save: {top_urls}")
-        print(f"💾 Total URLs analyzed: {total_analyzed}")
+        logger.debug("Saving onboarding results for %s: %s (%d URLs analyzed)", site_id, top_urls, total_analyzed)
         
         from app.models.url_models import OnboardingResult
         
@@ -574,11 +656,9 @@ class OnboardingUrlService:
             total_urls_analyzed=total_analyzed
         )
         
-        print(f"💾 Created OnboardingResult object: {onboarding_result}")
-        
         try:
             self.config_service.mark_site_onboarded(site_id, onboarding_result)
-            print(f"✅ Successfully saved onboarding results for {site_id}")
+            logger.info("Saved onboarding results for %s", site_id)
         except Exception as e:
-            print(f"❌ Error saving onboarding results for {site_id}: {str(e)}")
+            logger.warning("Error saving onboarding results for %s: %s", site_id, e)
             raise
\ No newline at end of file
@@ -4,9 +4,11 @@
 # Purpose: Utility functions for URL processing and data management
 # ==============================================================================
 
+from .file_utils import atomic_write
 from .json_writer import JsonWriter, create_timestamped_directory, write_url_set, write_onboarding_result
 
 __all__ = [
+    'atomic_write',
     'JsonWriter',
     'create_timestamped_directory', 
     'write_url_set',
@@ -0,0 +1,57 @@
+# ==============================================================================
+# event_loop.py — Event loop selection
+# ==============================================================================
+# Purpose: Run async entry points on uvloop when it is installed
+# Sections: Imports, Public exports, Helper Functions
+# ==============================================================================
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+
+# Standard Library -----
+import asyncio
+from typing import Any, Coroutine
+
+# Third Party -----
+try:
+    import uvloop
+except ImportError:  # installed with uvicorn[standard], except on Windows
+    uvloop = None
+
+# ==============================================================================
+# Public exports
+# ==============================================================================
+__all__ = ["run"]
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def run(main: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion, preferring uvloop's libuv-based loop.
+    
+    The server needs no equivalent: uvicorn's default `--loop auto` already
+    picks uvloop when it is importable, and its lifespan closes the shared clients.
+    Here they are closed before the loop ends, since pooled connections cannot be
+    closed from another loop afterwards.
+    
+    Args:
+        main: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    runner = uvloop.run if uvloop is not None else asyncio.run
+    return runner(_run_and_close_clients(main))
+
+
+async def _run_and_close_clients(main: Coroutine[Any, Any, Any]) -> Any:
+    """Await main, then close the shared HTTP clients while their loop is still running."""
+    from app.clients import close_all
+
+    try:
+        return await main
+    finally:
+        await close_all()
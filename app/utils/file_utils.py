@@ -0,0 +1,46 @@
+# ==============================================================================
+# file_utils.py — File helpers
+# ==============================================================================
+# Purpose: Crash-safe file writes shared by the config and cache layers
+# Sections: Imports, Public exports, Helper Functions
+# ==============================================================================
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+
+# Standard Library -----
+import os
+import tempfile
+from pathlib import Path
+
+# ==============================================================================
+# Public exports
+# ==============================================================================
+__all__ = ["atomic_write"]
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Replace a file in one step, so a crash or a concurrent reader never sees it half-written.
+
+    Each call writes its own temporary file next to the target, so concurrent
+    writers of the same path never share one; the last replace wins.
+
+    Args:
+        path: File to create or replace
+        data: Complete new file content
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
@@ -13,7 +13,7 @@
 import asyncio
 import time
 import random
-from typing import List, Optional, Callable, Any
+from typing import Awaitable, Dict, Iterable, List, Optional, Callable, Any
 from collections import deque
 from dataclasses import dataclass
 
@@ -214,6 +214,41 @@ class AdaptiveRateLimiter:
             return 0.0
         return self.rate_limit_count / self.total_requests
 
+class TokenBucket:
+    """
+    Proactive client-side limiter: callers wait for capacity instead of
+    sending requests that the API would reject with a 429.
+    
+    Tokens refill continuously at `rate` per `period`. acquire() reserves
+    its amount immediately and sleeps off any deficit, so waiters are
+    served in arrival order without a lock.
+    """
+    
+    def __init__(self, rate: float, period: float = 60.0, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+        
+        Args:
+            rate: Tokens granted per period (e.g. requests or LLM tokens per minute)
+            period: Length of the refill period in seconds
+            capacity: Maximum burst size; defaults to rate
+        """
+        self.capacity = capacity if capacity is not None else rate
+        self._refill_per_second = rate / period
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+    
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` tokens are available and consume them."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self._refill_per_second)
+        self._updated_at = now
+        
+        # an oversized request waits for a full bucket rather than forever
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self._refill_per_second)
+
 # ==============================================================================
 # Helper Functions
 # ==============================================================================
@@ -234,6 +269,42 @@ def create_rate_limiter_from_config(config_service) -> AdaptiveRateLimiter:
         window_size=config_service.firecrawl_rate_limit_window
     )
 
+async def gather_with_concurrency(
+    items: Iterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    limit: int
+) -> List[Any]:
+    """
+    Run worker over every item with at most `limit` calls in flight.
+    
+    `limit` workers share one iterator and each pulls its next item only when
+    it is free, so a new item starts as soon as any slot frees (one slow item
+    never holds back the rest the way fixed-size batches do) and a lazy
+    iterable is consumed as the work proceeds rather than all up front.
+    
+    Args:
+        items: Items to process (any iterable, consumed once)
+        worker: Async function applied to each item
+        limit: Maximum number of concurrent worker calls
+        
+    Returns:
+        Results in item order; failures are returned as exception objects
+    """
+    # next() on a shared iterator never awaits, so workers cannot take the same item
+    pending = enumerate(items)
+    results: Dict[int, Any] = {}
+    
+    async def run_worker() -> None:
+        for index, item in pending:
+            try:
+                results[index] = await worker(item)
+            except Exception as e:
+                results[index] = e
+    
+    await asyncio.gather(*(run_worker() for _ in range(limit)))
+    
+    return [results[index] for index in range(len(results))]
+
 async def process_with_rate_limiting(
     items: List[Any],
     processor: Callable[[Any], Any],
@@ -12,6 +12,7 @@
 # Standard Library -----
 import asyncio
 from datetime import datetime
+from functools import lru_cache
 import time
 from typing import List, Set, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, urlencode
@@ -87,30 +88,27 @@ def find_duplicate_resolutions(url_mapping: Dict[str, str]) -> UrlDeduplicationR
     start_time = time.time()
     
     resolved_to_originals: Dict[str, List[str]] = {}
+    unique_urls = []
+    duplicates = []
 
+    # one pass: the first URL to reach a page is kept, later ones are duplicates
     for original, resolved in url_mapping.items():
-        if resolved in resolved_to_originals:
-            resolved_to_originals[resolved].append(original)
-        else:
+        originals = resolved_to_originals.get(resolved)
+        if originals is None:
             resolved_to_originals[resolved] = [original]
+            unique_urls.append(original)
+        else:
+            originals.append(original)
+            duplicates.append(original)
 
-    # find URLs that resolve to the same page (keep first)
-    duplicates = set()
-    duplicate_groups = []
-    for resolved, originals in resolved_to_originals.items():
-        if len(originals) > 1:
-            duplicates.update(originals[1:])
-            duplicate_groups.append(originals)
-    
-    # create unique URLs list (remove duplicates)
-    unique_urls = [url for url in url_mapping.keys() if url not in duplicates]
+    duplicate_groups = [originals for originals in resolved_to_originals.values() if len(originals) > 1]
     
     processing_time = time.time() - start_time
     
     return UrlDeduplicationResult(
-        original_urls=list(url_mapping.keys()),
+        original_urls=list(url_mapping),
         unique_urls=unique_urls,
-        duplicates_removed=list(duplicates),
+        duplicates_removed=duplicates,
         duplicate_groups=duplicate_groups,
         total_original=len(url_mapping),
         total_unique=len(unique_urls),
@@ -188,10 +186,14 @@ def filter_resolved_duplicates(url_infos: List[UrlInfo], resolved_mapping: Dict[
         }
     )
 
+@lru_cache(maxsize=65536)
 def normalize_url(url: str) -> str:
     """
     Normalize URL by removing trailing slashes, normalizing scheme, etc.
     
+    Results are memoized: the same URL usually arrives from several sources
+    (sitemap, Firecrawl map, crawl) and again on every processing run.
+    
     Args:
         url: URL to normalize
         
@@ -211,7 +213,7 @@ def normalize_url(url: str) -> str:
     path = parsed.path.rstrip("/") if parsed.path != "/" else "/"
 
     # normalize query parameters (sort)
-    query_parts = parse_qs(parsed.query, keep_blank_values=True)
+    query_parts = parse_qs(parsed.query, keep_blank_values=True) if parsed.query else None
     if query_parts:
         sorted_query = sorted(query_parts.items())
         query = urlencode(sorted_query, doseq=True)
@@ -274,6 +276,9 @@ def merge_url_lists(url_lists: List[List[UrlInfo]]) -> List[UrlInfo]:
     """
     url_dict: Dict[str, UrlInfo] = {}
 
+    # inputs are already-validated UrlInfo objects, so the merged copies skip
+    # re-validation (model_construct); never feed external data through it
+
     for url_list in url_lists:
         for url_info in url_list:
             # Use normalized URL as the key for proper deduplication
@@ -285,8 +290,8 @@ def merge_url_lists(url_lists: List[List[UrlInfo]]) -> List[UrlInfo]:
 
                 # only update time if methods are identical
                 if existing_info.detection_methods == url_info.detection_methods:
-                    if url_info.detected_at > existing_info.detected_at:
-                        url_dict[normalized_url] = UrlInfo(
+                    if _later(url_info.detected_at, existing_info.detected_at):
+                        url_dict[normalized_url] = UrlInfo.model_construct(
                             url=normalized_url,  # Use normalized URL
                             detection_methods=existing_info.detection_methods,
                             detected_at=url_info.detected_at
@@ -296,16 +301,16 @@ def merge_url_lists(url_lists: List[List[UrlInfo]]) -> List[UrlInfo]:
                     combined_methods = list(
                         set(existing_info.detection_methods) | set(url_info.detection_methods)
                     )
-                    latest_time = max(existing_info.detected_at, url_info.detected_at)
+                    latest_time = max(filter(None, (existing_info.detected_at, url_info.detected_at)), default=None)
 
-                    url_dict[normalized_url] = UrlInfo(
+                    url_dict[normalized_url] = UrlInfo.model_construct(
                         url=normalized_url,  # Use normalized URL
                         detection_methods=combined_methods,
                         detected_at=latest_time
                     )
             else:
                 # new URL - add to dictionary with normalized URL
-                url_dict[normalized_url] = UrlInfo(
+                url_dict[normalized_url] = UrlInfo.model_construct(
                     url=normalized_url,  # Use normalized URL
                     detection_methods=url_info.detection_methods,
                     detected_at=url_info.detected_at
@@ -384,13 +389,14 @@ def remove_query_parameters(url: str, params_to_remove: List[str] = None) -> str
     except Exception:
         return url
 
-def create_url_info(url: str, detection_method: DetectionMethod) -> UrlInfo:
+def create_url_info(url: str, detection_method: DetectionMethod, detected_at: Optional[datetime] = None) -> UrlInfo:
     """
     Create a UrlInfo object from a raw URL and detection method.
     
     Args:
         url: URL string
         detection_method: Method used to detect this URL
+        detected_at: Detection time; pass one value to share it across a batch
         
     Returns:
         UrlInfo object with metadata
@@ -398,7 +404,7 @@ def create_url_info(url: str, detection_method: DetectionMethod) -> UrlInfo:
     return UrlInfo(
         url=url,
         detection_methods=[detection_method],
-        detected_at=datetime.now()
+        detected_at=detected_at or datetime.now()
     )
 
 def add_detection_method(url_info: UrlInfo, method: DetectionMethod) -> UrlInfo:
@@ -414,7 +420,8 @@ def add_detection_method(url_info: UrlInfo, method: DetectionMethod) -> UrlInfo:
     """
     if method not in url_info.detection_methods:
         updated_methods = url_info.detection_methods + [method]
-        return UrlInfo(
+        # fields come from a validated UrlInfo plus a DetectionMethod member
+        return UrlInfo.model_construct(
             url=url_info.url,
             detection_methods=updated_methods,
             detected_at=url_info.detected_at
@@ -637,3 +644,7 @@ def _should_follow_redirect(url: str, redirect_url: str) -> bool:
         return False
     except Exception:
         return False
+
+def _later(candidate: Optional[datetime], current: Optional[datetime]) -> bool:
+    """Check if candidate is a newer detection time; a missing time is never newer."""
+    return candidate is not None and (current is None or candidate > current)
@@ -3,14 +3,15 @@
 Test script to run Judiciary site processing and check if saving works.
 """
 
-import asyncio
 import sys
 from pathlib import Path
 
-# Add the app directory to the Python path
-sys.path.insert(0, str(Path(__file__).parent / "app"))
+# Add the project root to the Python path; importing through the "app" package
+# keeps a single copy of each module (and of the config_service singleton)
+sys.path.insert(0, str(Path(__file__).parent))
 
-from services.url_service import UrlService
+from app.services.url_service import UrlService
+from app.utils.event_loop import run
 
 async def main():
     """Test the Judiciary site processing."""
@@ -32,4 +33,4 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
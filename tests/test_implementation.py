@@ -155,6 +155,1032 @@ def test_ai_config():
         print(f"❌ AI config test failed: {str(e)}")
         return False
 
+def test_prompt_prefilter():
+    """Test local URL pre-filtering ahead of the LLM call."""
+    print("\nTesting prompt pre-filter...")
+    
+    from app.ai.config import AIConfig
+    
+    urls = [
+        "https://example.com/about-us",
+        "https://example.com/privacy-policy",
+        "https://example.com/council-updates/latest-news",
+        "https://example.com/services/bins",
+    ]
+    candidates = AIConfig.prefilter_urls(urls)
+    
+    # static pages are always dropped; too few hub hints falls back to the rest
+    assert "https://example.com/about-us" not in candidates
+    assert "https://example.com/privacy-policy" not in candidates
+    assert candidates == urls[2:]
+    print("✅ Static pages filtered before analysis")
+    
+    return True
+
+def test_prompt_cache():
+    """Test the on-disk LLM response cache."""
+    print("\nTesting prompt cache...")
+    
+    import tempfile
+    from app.ai.prompt_cache import PromptCache
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = PromptCache(cache_dir=Path(tmp_dir))
+        key = cache.make_key("gpt-4o-mini", "v1", "Example Site", ["https://example.com/b", "https://example.com/a"])
+        
+        # URL order must not change the key, but a prompt edit must
+        assert key == cache.make_key("gpt-4o-mini", "v1", "Example Site", ["https://example.com/a", "https://example.com/b"])
+        assert key != cache.make_key("gpt-4o-mini", "v2", "Example Site", ["https://example.com/a", "https://example.com/b"])
+        assert cache.get(key) is None
+        
+        cache.set(key, {"urls": ["https://example.com/a"]})
+        assert cache.get(key) == {"urls": ["https://example.com/a"]}
+        assert not list(Path(tmp_dir).glob("*.tmp"))
+        print("✅ Cached selection round-trips, written atomically")
+        
+        scope = cache.make_scope("gpt-4o-mini", "v1", "Example Site")
+        urls = [f"https://example.com/page-{i}" for i in range(100)]
+        cache.set(key, {"urls": ["https://example.com/a"]}, scope=scope, sketch=cache.make_sketch(urls))
+        assert cache.get_similar(scope, cache.make_sketch(urls[:-1])) == {"urls": ["https://example.com/a"]}
+        assert cache.get_similar(scope, cache.make_sketch(urls[:50])) is None
+        print("✅ Near-duplicate URL sets reuse the cached selection")
+        
+        # large URL sets are indexed by a fixed-size sketch, not their full URL list
+        many_urls = [f"https://example.com/article-{i}" for i in range(20000)]
+        sketch = cache.make_sketch(many_urls)
+        assert len(sketch) == cache.sketch_size
+        cache.set(key, {"urls": ["https://example.com/b"]}, scope=scope, sketch=sketch)
+        assert cache._scope_path(scope).stat().st_size < 20_000
+        assert cache.get_similar(scope, cache.make_sketch(many_urls[:-10])) == {"urls": ["https://example.com/b"]}
+        assert cache.get_similar(scope, cache.make_sketch(many_urls[:10000])) is None
+        print("✅ Large URL sets are compared through compact sketches")
+        
+        # concurrent index updates must not drop each other's entries
+        import threading
+        threads = [
+            threading.Thread(target=cache.set, args=(f"key-{i}", {"urls": []}, scope, [i]))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache._read_json(cache._scope_path(scope))) == 5
+        print("✅ Concurrent index updates are serialized")
+        
+        cache.ttl_seconds = -1
+        assert cache.get(key) is None
+        assert cache.get_similar(scope, cache.make_sketch(urls)) is None
+        print("✅ Expired entries are misses")
+    
+    return True
+
+def test_batch_packing():
+    """Test token-budgeted URL batch packing."""
+    print("\nTesting batch packing...")
+    
+    from app.ai.config import AIConfig
+    
+    urls = [f"https://example.com/section-{i}/" for i in range(1000)]
+    batches = AIConfig.pack_batches(urls, prompt_overhead=0)
+    assert batches == [urls]
+    print("✅ Small URL sets fit in a single batch")
+    
+    original_budget = AIConfig.MAX_TOKENS_PER_REQUEST
+    try:
+        AIConfig.MAX_TOKENS_PER_REQUEST = 100
+        batches = AIConfig.pack_batches(urls, prompt_overhead=0)
+    finally:
+        AIConfig.MAX_TOKENS_PER_REQUEST = original_budget
+    
+    assert len(batches) > 1
+    assert [url for batch in batches for url in batch] == urls
+    print(f"✅ Tight budget split URLs into {len(batches)} ordered batches")
+    
+    return True
+
+def test_hub_classifier():
+    """Test local content-hub ranking."""
+    print("\nTesting hub classifier...")
+    
+    from app.ai.hub_classifier import hub_classifier
+    
+    hub = "https://example.com/news/"
+    article = "https://example.com/news/2024/05/council-approves-new-budget-for-next-year"
+    static = "https://example.com/privacy-policy"
+    
+    assert hub_classifier.score_url(hub) > hub_classifier.score_url(article)
+    assert hub_classifier.score_url(hub) > hub_classifier.score_url(static)
+    print("✅ Hub pages outscore articles and static pages")
+    
+    assert hub_classifier.rank_urls([static, article, hub], top_k=1) == [hub]
+    assert len(hub_classifier.rank_urls([static, article, hub], top_k=5)) == 3
+    print("✅ Ranking keeps the top_k most hub-like URLs")
+    
+    return True
+
+def test_prompt_url_compression():
+    """Test shared-origin URL rendering in analysis prompts."""
+    print("\nTesting prompt URL compression...")
+    
+    from app.ai.config import AIConfig
+    from app.models.url_models import UrlAnalysisRequest
+    
+    request = UrlAnalysisRequest(
+        urls=["https://example.com/news/", "https://example.com/blog/"],
+        site_name="Example"
+    )
+    prompt = AIConfig.build_analysis_prompt(request)
+    assert "Base URL: https://example.com\n" in prompt
+    assert prompt.endswith("/news/\n/blog/\n")
+    assert AIConfig.expand_urls(request, ["/news/", "https://example.com/blog/"]) == request.urls
+    print("✅ Shared origin is stated once and results are rejoined")
+    
+    mixed = UrlAnalysisRequest(
+        urls=["https://example.com/news/", "https://other.com/blog/"],
+        site_name="Example"
+    )
+    assert AIConfig.build_analysis_prompt(mixed).endswith("https://other.com/blog/\n")
+    assert AIConfig.expand_urls(mixed, ["https://other.com/blog/"]) == ["https://other.com/blog/"]
+    print("✅ Mixed origins keep absolute URLs")
+    
+    return True
+
+def test_bounded_gather():
+    """Test the semaphore-bounded gather helper."""
+    print("\nTesting bounded gather...")
+    
+    import asyncio
+    from app.utils.rate_limiter import gather_with_concurrency
+    
+    in_flight = 0
+    peak = 0
+    
+    async def worker(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if item == 3:
+            raise ValueError("boom")
+        return item * 2
+    
+    results = asyncio.run(gather_with_concurrency(list(range(10)), worker, limit=3))
+    assert peak == 3
+    assert results[:3] == [0, 2, 4] and isinstance(results[3], ValueError)
+    print("✅ Concurrency is capped and results keep item order")
+    
+    # a lazy iterable is pulled only as workers free up, not unpacked up front
+    pulled = 0
+    
+    def lazy_items():
+        nonlocal pulled
+        for item in range(10):
+            pulled += 1
+            yield item
+    
+    async def first_result_pull_count(item):
+        await asyncio.sleep(0.01)
+        return pulled
+    
+    results = asyncio.run(gather_with_concurrency(lazy_items(), first_result_pull_count, limit=3))
+    assert results[0] == 3 and len(results) == 10
+    print("✅ Items are consumed as the fan-out proceeds")
+    
+    return True
+
+def test_token_bucket():
+    """Test proactive token-bucket rate limiting."""
+    print("\nTesting token bucket...")
+    
+    import asyncio
+    import time
+    from app.utils.rate_limiter import TokenBucket
+    
+    async def acquire_all(bucket, count):
+        start = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - start
+    
+    assert asyncio.run(acquire_all(TokenBucket(rate=5, period=1), 5)) < 0.05
+    print("✅ Bursts up to capacity do not wait")
+    
+    assert asyncio.run(acquire_all(TokenBucket(rate=50, period=1, capacity=1), 3)) >= 0.035
+    print("✅ Requests beyond capacity wait for refill")
+    
+    return True
+
+def test_sitemap_parsing():
+    """Test streaming sitemap and sitemap index parsing."""
+    print("\nTesting sitemap parsing...")
+    
+    from app.crawler.sitemap_crawler import SitemapCrawler
+    
+    crawler = SitemapCrawler()
+    urlset = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+        'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">'
+        + "".join(
+            f"<url><loc> https://example.com/page-{i} </loc>"
+            f"<image:image><image:loc>https://example.com/{i}.png</image:loc></image:image></url>"
+            for i in range(5000)
+        )
+        + "</urlset>"
+    ).encode("utf-8")
+    urls = crawler._parse_sitemap_content(urlset)
+    assert len(urls) == 5000 and urls[0] == "https://example.com/page-0"
+    print("✅ Namespaced sitemap streamed in order, ignoring nested image locs")
+    
+    assert crawler._parse_sitemap_content(b"<urlset><url><loc>https://example.com/</loc></url></urlset>") == ["https://example.com/"]
+    print("✅ Sitemaps without a namespace are supported")
+    
+    index = (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<sitemap><loc>https://example.com/sitemap-1.xml</loc></sitemap>"
+        "</sitemapindex>"
+    ).encode("utf-8")
+    assert crawler._parse_sitemap_index_content(index) == ["https://example.com/sitemap-1.xml"]
+    print("✅ Sitemap index entries are extracted")
+    
+    latin1 = '<?xml version="1.0" encoding="ISO-8859-1"?><urlset><url><loc>https://example.com/caf\u00e9</loc></url></urlset>'
+    assert crawler._parse_sitemap_content(latin1.encode("iso-8859-1")) == ["https://example.com/caf\u00e9"]
+    print("✅ Raw bytes are decoded using the encoding declared in the prolog")
+    
+    assert crawler._parse_any(index) == ("index", ["https://example.com/sitemap-1.xml"])
+    assert crawler._parse_any(urlset)[0] == "urls"
+    print("✅ A single parse dispatches on the root tag")
+    
+    try:
+        crawler._parse_sitemap_content(b"<urlset><url>")
+    except Exception as e:
+        assert "Failed to parse sitemap XML" in str(e)
+    else:
+        raise AssertionError("truncated XML should fail to parse")
+    print("✅ Malformed XML raises a parse error")
+    
+    return True
+
+def test_sitemap_conditional_get():
+    """Test that unchanged sitemaps are revalidated instead of refetched."""
+    print("\nTesting sitemap conditional GET...")
+    
+    import asyncio
+    from app.crawler.sitemap_crawler import SitemapCrawler
+    
+    body = b"<urlset><url><loc>https://example.com/a</loc></url></urlset>"
+    sent_headers = []
+    
+    class FakeResponse:
+        def __init__(self, status_code, headers, content=b""):
+            self.status_code, self.headers, self.content = status_code, headers, content
+    
+    class FakeClient:
+        async def get(self, url, headers=None):
+            sent_headers.append(headers)
+            if headers and headers.get("If-None-Match") == '"v1"':
+                return FakeResponse(304, {})
+            return FakeResponse(200, {"ETag": '"v1"'}, body)
+    
+    async def fetch_twice():
+        crawler = SitemapCrawler()
+        crawler._client = FakeClient()
+        first = await crawler._fetch_sitemap_urls("https://example.com/sitemap.xml")
+        second = await crawler._fetch_sitemap_urls("https://example.com/sitemap.xml")
+        return first, second
+    
+    SitemapCrawler.clear_conditional_cache()
+    first, second = asyncio.run(fetch_twice())
+    assert first == second == ["https://example.com/a"]
+    assert sent_headers == [None, {"If-None-Match": '"v1"'}]
+    print("✅ A 304 reuses the previously parsed sitemap")
+    
+    # the cache is bounded by URLs held, evicting the least recently used sitemap
+    import sys
+    crawler_module = sys.modules["app.crawler.sitemap_crawler"]
+    original_budget = crawler_module._CONDITIONAL_CACHE_MAX_URLS
+    crawler_module._CONDITIONAL_CACHE_MAX_URLS = 5
+    validators = {"If-None-Match": '"v1"'}
+    try:
+        SitemapCrawler.clear_conditional_cache()
+        SitemapCrawler._store_conditional(("a", "p"), validators, ["u"] * 2)
+        SitemapCrawler._store_conditional(("b", "p"), validators, ["u"] * 2)
+        SitemapCrawler._store_conditional(("c", "p"), validators, ("urls", ["u"] * 3))
+        assert list(SitemapCrawler._conditional_cache) == [("b", "p"), ("c", "p")]
+        assert SitemapCrawler._conditional_cache_urls == 5
+        SitemapCrawler._store_conditional(("d", "p"), validators, ["u"] * 6)
+        assert ("d", "p") not in SitemapCrawler._conditional_cache
+    finally:
+        crawler_module._CONDITIONAL_CACHE_MAX_URLS = original_budget
+    print("✅ Remembered sitemaps are capped by total URL count")
+    
+    SitemapCrawler.clear_conditional_cache()
+    return True
+
+def test_sitemap_index_dedup():
+    """Test that each child sitemap is fetched once, even across nested indexes."""
+    print("\nTesting sitemap index deduplication...")
+    
+    import asyncio
+    from app.crawler.sitemap_crawler import SitemapCrawler
+    
+    def index(*children):
+        return ("<sitemapindex>" + "".join(f"<sitemap><loc>{c}</loc></sitemap>" for c in children) + "</sitemapindex>").encode()
+    
+    pages = {
+        "https://example.com/index.xml": index("https://example.com/a.xml", "https://example.com/a.xml", "https://example.com/nested.xml"),
+        "https://example.com/nested.xml": index("https://example.com/a.xml", "https://example.com/index.xml", "https://example.com/b.xml"),
+        "https://example.com/a.xml": b"<urlset><url><loc>https://example.com/a</loc></url></urlset>",
+        "https://example.com/b.xml": b"<urlset><url><loc>https://example.com/b</loc></url></urlset>",
+    }
+    fetched = []
+    
+    class FakeResponse:
+        status_code, headers = 200, {}
+        def __init__(self, content):
+            self.content = content
+    
+    class FakeClient:
+        async def get(self, url, headers=None):
+            fetched.append(url)
+            return FakeResponse(pages[url])
+    
+    async def crawl():
+        crawler = SitemapCrawler()
+        crawler._client = FakeClient()
+        return await crawler._fetch_sitemap_urls("https://example.com/index.xml")
+    
+    urls = asyncio.run(crawl())
+    assert sorted(urls) == ["https://example.com/a", "https://example.com/b"]
+    assert sorted(fetched) == sorted(pages)
+    print("✅ Duplicate and cyclic child sitemaps are fetched once")
+    
+    # concurrent crawls on one crawler keep separate visited sets, and one
+    # request cap covers every nested index level of a crawl
+    pages = {"https://example.com/root.xml": index(*(f"https://example.com/index-{i}.xml" for i in range(3)))}
+    for i in range(3):
+        children = [f"https://example.com/leaf-{i}-{j}.xml" for j in range(3)]
+        pages[f"https://example.com/index-{i}.xml"] = index(*children)
+        for child in children:
+            pages[child] = f"<urlset><url><loc>{child}/page</loc></url></urlset>".encode()
+    fetched.clear()
+    in_flight = 0
+    peak = 0
+    
+    class SlowClient:
+        async def get(self, url, headers=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            fetched.append(url)
+            return FakeResponse(pages[url])
+    
+    async def crawl_concurrently():
+        crawler = SitemapCrawler()
+        crawler._client = SlowClient()
+        crawler._max_concurrent_requests = 2
+        return await asyncio.gather(*(crawler._fetch_sitemap_urls("https://example.com/root.xml") for _ in range(2)))
+    
+    first, second = asyncio.run(crawl_concurrently())
+    assert len(first) == len(second) == 9
+    assert len(fetched) == 2 * len(pages)
+    assert peak <= 2 * 2  # two crawls, each capped at two child sitemap requests
+    print("✅ Concurrent crawls keep their own state under one request cap per crawl")
+    
+    return True
+
+def test_firecrawl_rate_limit_detection():
+    """Test that only HTTP 429 SDK errors are treated as rate limits."""
+    print("\nTesting Firecrawl rate limit detection...")
+    
+    import asyncio
+    import sys
+    import aiohttp
+    from app.clients.firecrawl_client import FirecrawlClient, FirecrawlRateLimited, _StatusAwareFirecrawlApp
+    
+    class FakeResponse:
+        def __init__(self, status):
+            self.status = status
+        
+        async def json(self):
+            return {"error": "Too many requests at /page-429"}
+    
+    app = _StatusAwareFirecrawlApp(api_key="fc-test")
+    
+    async def raised_by(status):
+        try:
+            await app._handle_error(FakeResponse(status), "start crawl job")
+        except aiohttp.ClientError as e:
+            return e
+    
+    assert isinstance(asyncio.run(raised_by(429)), FirecrawlRateLimited)
+    assert not isinstance(asyncio.run(raised_by(404)), FirecrawlRateLimited)
+    print("✅ Rate limits are detected from the response status")
+    
+    # a crawl that keeps hitting 429s gives up with FirecrawlRateLimited...
+    class RateLimitedApp:
+        calls = 0
+        
+        async def crawl_url(self, **kwargs):
+            RateLimitedApp.calls += 1
+            raise FirecrawlRateLimited("Rate limited while trying to start crawl job")
+    
+    class FakeBucket:
+        async def acquire(self, tokens=1):
+            return None
+    
+    class RateLimitedClient(FirecrawlClient):
+        def __init__(self):
+            self._app = RateLimitedApp()
+            self._rate_limiter = FakeBucket()
+        
+        async def __aenter__(self):
+            return self
+        
+        async def __aexit__(self, *exc_info):
+            return None
+    
+    async def no_sleep(delay, result=None):
+        return result
+    
+    original_sleep = asyncio.sleep
+    asyncio.sleep = no_sleep
+    try:
+        try:
+            asyncio.run(RateLimitedClient().crawl_single_url("https://example.com/a", max_depth=2, limit=2))
+        except FirecrawlRateLimited:
+            pass
+        else:
+            raise AssertionError("exhausted rate limit retries should raise FirecrawlRateLimited")
+        assert RateLimitedApp.calls == 3
+        print("✅ Exhausted rate limit retries are reported, not swallowed")
+        
+        # ...which the per-URL fallback records as a rate limit event
+        import app.utils.rate_limiter as rate_limiter_module
+        from app.utils.rate_limiter import AdaptiveRateLimiter
+        
+        events = []
+        
+        class RecordingRateLimiter(AdaptiveRateLimiter):
+            def record_event(self, success, is_rate_limit=False, response_time=None):
+                events.append((success, is_rate_limit))
+            
+            async def wait_if_needed(self):
+                return None
+        
+        original_factory = rate_limiter_module.create_rate_limiter_from_config
+        rate_limiter_module.create_rate_limiter_from_config = lambda config: RecordingRateLimiter()
+        url_service_module = sys.modules["app.services.url_service"]
+        try:
+            service = url_service_module.UrlService()
+            discovered = asyncio.run(service._crawl_top_urls_individually(RateLimitedClient(), ["https://example.com/a"]))
+        finally:
+            rate_limiter_module.create_rate_limiter_from_config = original_factory
+    finally:
+        asyncio.sleep = original_sleep
+    
+    assert discovered == {}
+    assert events == [(False, True)]
+    print("✅ A crawl that keeps hitting 429s is recorded as a rate limit event")
+    
+    return True
+
+def test_url_info_timestamps():
+    """Test that UrlInfo timestamps are optional and merge cleanly."""
+    print("\nTesting UrlInfo timestamps...")
+    
+    from datetime import datetime
+    from app.models.url_models import UrlInfo, DetectionMethod
+    from app.utils.url_utils import merge_url_lists
+    
+    ai_pick = UrlInfo(url="https://example.com/news", detection_methods=[])
+    assert ai_pick.detected_at is None
+    print("✅ UrlInfo can defer to its container's timestamp")
+    
+    seen = datetime(2025, 1, 1)
+    crawled = UrlInfo(url="https://example.com/news", detection_methods=[DetectionMethod.SITEMAP], detected_at=seen)
+    merged = merge_url_lists([[ai_pick], [crawled]])
+    assert len(merged) == 1 and merged[0].detected_at == seen
+    assert merge_url_lists([[crawled], [UrlInfo(url="https://example.com/news", detection_methods=[DetectionMethod.SITEMAP])]])[0].detected_at == seen
+    print("✅ Merging keeps the known detection time")
+    
+    return True
+
+def test_config_yaml_cache():
+    """Test that sites.yaml is parsed once per modification time."""
+    print("\nTesting config YAML cache...")
+    
+    import json
+    import os
+    import tempfile
+    from pathlib import Path
+    from app.services.config_service import _load_yaml
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sites.yaml"
+        path.write_text("sites: {}\n", encoding="utf-8")
+        mtime = path.stat().st_mtime_ns
+        size = path.stat().st_size
+        
+        first = _load_yaml(str(path), mtime, size)
+        assert _load_yaml(str(path), mtime, size) is first
+        print("✅ Unchanged config is served from the cache")
+        
+        sidecar = Path(str(path) + ".cache.json")
+        assert json.loads(sidecar.read_text(encoding="utf-8")) == {"source": [mtime, size], "config": first}
+        _load_yaml.cache_clear()
+        assert _load_yaml(str(path), mtime, size) == first
+        print("✅ A JSON sidecar is written and read back on the next cold load")
+        
+        # a YAML restored with an older mtime (cp -p, rsync -a) must not be served from the sidecar
+        path.write_text("sites: {restored: 1}\n", encoding="utf-8")
+        os.utime(path, ns=(mtime - 1_000_000_000, mtime - 1_000_000_000))
+        _load_yaml.cache_clear()
+        assert _load_yaml(str(path), path.stat().st_mtime_ns, path.stat().st_size) == {"sites": {"restored": 1}}
+        print("✅ A restored older config is parsed, not read from a stale sidecar")
+        mtime, size = path.stat().st_mtime_ns, path.stat().st_size
+        
+        path.write_text("sites: {a: 1}\n", encoding="utf-8")
+        os.utime(path, ns=(mtime + 1_000_000_000, mtime + 1_000_000_000))
+        assert _load_yaml(str(path), path.stat().st_mtime_ns, path.stat().st_size) == {"sites": {"a": 1}}
+        print("✅ An edited config is parsed again")
+        
+        from app.utils.file_utils import atomic_write
+        atomic_write(path, b"sites: {}\n")
+        assert path.read_text(encoding="utf-8") == "sites: {}\n"
+        assert not list(path.parent.glob("*.tmp"))
+        print("✅ Config writes replace the file atomically")
+    
+    from app.services.config_service import config_service
+    
+    previous_limit = os.environ.get("MAX_CONCURRENT_SITES")
+    os.environ["MAX_CONCURRENT_SITES"] = "3"
+    config_service.reload_env()
+    try:
+        assert config_service.max_concurrent_sites == 3
+        os.environ["MAX_CONCURRENT_SITES"] = "5"
+        assert config_service.max_concurrent_sites == 3
+        config_service.reload_env()
+        assert config_service.max_concurrent_sites == 5
+    finally:
+        if previous_limit is None:
+            os.environ.pop("MAX_CONCURRENT_SITES", None)
+        else:
+            os.environ["MAX_CONCURRENT_SITES"] = previous_limit
+        config_service.reload_env()
+    print("✅ Settings are read once and refreshed by reload_env()")
+    
+    assert config_service.load_sites_config() is config_service.load_sites_config()
+    print("✅ An unchanged sites.yaml is not re-validated")
+    
+    import sys
+    from app.models.config_models import SiteUpdate
+    config_module = sys.modules["app.services.config_service"]
+    site_id, site = next(iter(config_service.all_sites.items()))
+    
+    def fail_write(path, data):
+        raise AssertionError("no-op update rewrote sites.yaml")
+    
+    original_write = config_module.atomic_write
+    config_module.atomic_write = fail_write
+    try:
+        config_service.update_site_config(site_id, SiteUpdate(name=site.name))
+    finally:
+        config_module.atomic_write = original_write
+    print("✅ An update that changes nothing skips the write")
+    
+    payload = config_service.sites_payload_json()
+    assert config_service.sites_payload_json() is payload
+    assert set(json.loads(payload)) == set(config_service.all_sites)
+    print("✅ The /sites listing is serialized once")
+    
+    return True
+
+def test_trigger_responses():
+    """Test trigger endpoint error statuses and the streamed all-sites response."""
+    print("\nTesting trigger responses...")
+    
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
+    response = TestClient(app).post("/api/v1/trigger/not-a-site")
+    assert response.status_code == 404
+    assert "not found in configuration" in response.json()["error"]
+    print("✅ Unknown sites return 404 with an error message")
+    
+    # routing errors are raised by Starlette and must use the same shape
+    response = TestClient(app).get("/api/v1/no-such-route")
+    assert response.status_code == 404 and "error" in response.json()
+    response = TestClient(app).get("/api/v1/trigger/judiciary_uk")
+    assert response.status_code == 405 and "error" in response.json()
+    print("✅ Routing 404s and 405s use the {\"error\": ...} shape")
+    
+    response = TestClient(app).get("/api/v1/sites")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=60"
+    print("✅ The site listing is cacheable")
+    
+    import json
+    from app.routers.url_router import get_url_service
+    
+    class FakeUrlService:
+        async def process_site(self, site_id):
+            if site_id == "judiciary_uk":
+                raise RuntimeError("boom")
+            return {"site_id": site_id}
+    
+    async def fake_url_service():
+        return FakeUrlService()
+    
+    app.dependency_overrides[get_url_service] = fake_url_service
+    try:
+        response = TestClient(app).post("/api/v1/trigger/all")
+        single_response = TestClient(app).post("/api/v1/trigger/judiciary_uk")
+    finally:
+        app.dependency_overrides.clear()
+    assert single_response.status_code == 500
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = {line["site"]: line["result"] for line in map(json.loads, response.text.splitlines())}
+    assert lines["judiciary_uk"] == {"error": "boom"}
+    assert all(result == {"site_id": site} for site, result in lines.items() if site != "judiciary_uk")
+    print("✅ /trigger/all streams one NDJSON line per site")
+    
+    class FakeSingleUrlService:
+        async def process_site(self, site_id):
+            return {"site_id": site_id, "url_set": {"total_count": 0}}
+    
+    async def fake_single_url_service():
+        return FakeSingleUrlService()
+    
+    site_id = next(site for site in lines if site != "judiciary_uk")
+    app.dependency_overrides[get_url_service] = fake_single_url_service
+    try:
+        response = TestClient(app).post(f"/api/v1/trigger/{site_id}")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"site_id": site_id, "url_set": {"total_count": 0}}
+    print("✅ A single-site trigger returns the orjson-encoded result")
+    
+    return True
+
+def test_duplicate_resolutions():
+    """Test grouping of URLs that resolve to the same page."""
+    print("\nTesting duplicate resolution grouping...")
+    
+    from app.utils.url_utils import find_duplicate_resolutions
+    
+    result = find_duplicate_resolutions({
+        "https://example.com/a": "https://example.com/page",
+        "https://example.com/b": "https://example.com/other",
+        "https://example.com/c": "https://example.com/page",
+        "https://example.com/d": "https://example.com/page",
+    })
+    assert result.unique_urls == ["https://example.com/a", "https://example.com/b"]
+    assert result.duplicates_removed == ["https://example.com/c", "https://example.com/d"]
+    assert result.duplicate_groups == [["https://example.com/a", "https://example.com/c", "https://example.com/d"]]
+    assert (result.total_original, result.total_unique, result.total_duplicates) == (4, 2, 2)
+    print("✅ The first URL per page is kept and the rest are grouped as duplicates")
+    
+    return True
+
+def test_top_url_crawl_dedup():
+    """Test that URLs crawled from top URLs are deduplicated as they arrive."""
+    print("\nTesting top URL crawl dedup...")
+    
+    import asyncio
+    import sys
+    from app.models.url_models import UrlInfo
+    
+    url_service_module = sys.modules["app.services.url_service"]
+    
+    class FakeFirecrawlClient:
+        async def __aenter__(self):
+            return self
+        
+        async def __aexit__(self, *exc_info):
+            return None
+        
+        async def crawl_single_url(self, url, max_depth, limit):
+            if url.endswith("/broken"):
+                raise RuntimeError("crawl failed")
+            return ["https://example.com/shared", f"{url}/child", "https://example.com/shared"]
+    
+    # no adaptive spacing between fallback crawls, to keep the test fast
+    import os
+    from app.services.config_service import config_service
+    previous_min_delay = os.environ.get("FIRECRAWL_MIN_DELAY")
+    os.environ["FIRECRAWL_MIN_DELAY"] = "0"
+    config_service.reload_env()
+    
+    original_client = url_service_module.FirecrawlClient
+    url_service_module.FirecrawlClient = FakeFirecrawlClient
+    try:
+        service = url_service_module.UrlService()
+        url_infos = asyncio.run(service._get_additional_urls_from_top_urls([
+            "https://example.com/a",
+            "https://example.com/b",
+            "https://example.com/broken",
+        ]))
+    finally:
+        url_service_module.FirecrawlClient = original_client
+    
+    assert all(isinstance(url_info, UrlInfo) for url_info in url_infos)
+    assert sorted(url_info.url for url_info in url_infos) == [
+        "https://example.com/a/child",
+        "https://example.com/b/child",
+        "https://example.com/shared",
+    ]
+    print("✅ Each discovered URL is returned once and failed crawls are skipped")
+    
+    class FakeBatchFirecrawlClient(FakeFirecrawlClient):
+        async def batch_scrape_links(self, urls):
+            return [link for url in urls for link in (f"{url}/child", "https://example.com/shared")], []
+        
+        async def crawl_single_url(self, url, max_depth, limit):
+            raise AssertionError("batch scrape succeeded, per-URL crawl should not run")
+    
+    url_service_module.FirecrawlClient = FakeBatchFirecrawlClient
+    try:
+        url_infos = asyncio.run(service._get_additional_urls_from_top_urls([
+            "https://example.com/a",
+            "https://example.com/b",
+        ]))
+    finally:
+        url_service_module.FirecrawlClient = original_client
+    
+    assert sorted(url_info.url for url_info in url_infos) == [
+        "https://example.com/a/child",
+        "https://example.com/b/child",
+        "https://example.com/shared",
+    ]
+    print("✅ Top URLs are scraped in one batch, falling back to per-URL crawls on failure")
+    
+    # one failed batch job keeps the other batches' links and re-crawls only its own URLs
+    from app.clients.firecrawl_client import FirecrawlClient
+    from types import SimpleNamespace
+    
+    scraped_batches = []
+    crawled_urls = []
+    
+    class FakeApp:
+        async def batch_scrape_urls(self, urls, **kwargs):
+            scraped_batches.append(list(urls))
+            if "https://example.com/page-0" in urls:
+                raise RuntimeError("batch job failed")
+            return SimpleNamespace(data=[SimpleNamespace(links=[f"{url}/child"]) for url in urls])
+    
+    class FakeBucket:
+        async def acquire(self, tokens=1):
+            return None
+    
+    class PartialBatchFirecrawlClient(FirecrawlClient):
+        def __init__(self):
+            self._app = None
+        
+        async def __aenter__(self):
+            self._app = FakeApp()
+            self._rate_limiter = FakeBucket()
+            return self
+        
+        async def __aexit__(self, *exc_info):
+            return None
+        
+        async def crawl_single_url(self, url, max_depth, limit):
+            crawled_urls.append(url)
+            return [f"{url}/crawled"]
+    
+    top_urls = [f"https://example.com/page-{i}" for i in range(FirecrawlClient._BATCH_SCRAPE_SIZE + 1)]
+    url_service_module.FirecrawlClient = PartialBatchFirecrawlClient
+    try:
+        url_infos = asyncio.run(service._get_additional_urls_from_top_urls(top_urls))
+    finally:
+        url_service_module.FirecrawlClient = original_client
+    
+    assert len(scraped_batches) == 2
+    failed_batch = top_urls[:FirecrawlClient._BATCH_SCRAPE_SIZE]
+    assert sorted(crawled_urls) == sorted(failed_batch)
+    assert {url_info.url for url_info in url_infos} == (
+        {f"{url}/crawled" for url in failed_batch} | {f"{top_urls[-1]}/child"}
+    )
+    print("✅ A failed batch only re-crawls its own URLs")
+    
+    in_flight = {}
+    peak_in_flight = {}
+    
+    class FakeSlowFirecrawlClient(FakeFirecrawlClient):
+        async def crawl_single_url(self, url, max_depth, limit):
+            host = url.split("/")[2]
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak_in_flight[host] = max(peak_in_flight.get(host, 0), in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return [f"{url}/child"]
+    
+    url_service_module.FirecrawlClient = FakeSlowFirecrawlClient
+    try:
+        url_infos = asyncio.run(service._crawl_top_urls_individually(
+            FakeSlowFirecrawlClient(),
+            [f"https://a.example.com/{i}" for i in range(10)] + [f"https://b.example.com/{i}" for i in range(3)]
+        ))
+    finally:
+        url_service_module.FirecrawlClient = original_client
+        if previous_min_delay is None:
+            os.environ.pop("FIRECRAWL_MIN_DELAY", None)
+        else:
+            os.environ["FIRECRAWL_MIN_DELAY"] = previous_min_delay
+        config_service.reload_env()
+    
+    assert len(url_infos) == 13
+    assert peak_in_flight["a.example.com"] == service._MAX_CRAWLS_PER_HOST
+    assert peak_in_flight["b.example.com"] == 3
+    print("✅ Fallback crawls are capped per host, not globally")
+    
+    return True
+
+def test_unique_resolution_replacements():
+    """Test that duplicate top URLs are replaced from one batched resolution."""
+    print("\nTesting unique resolution replacements...")
+    
+    import asyncio
+    import sys
+    from app.models.url_models import UrlResolutionMapping, UrlResolutionResult
+    
+    url_service_module = sys.modules["app.services.url_service"]
+    
+    # news and latest-news are the same page, as are events and whats-on
+    resolves_to = {
+        "https://example.gov.uk/latest-news": "https://example.gov.uk/news",
+        "https://example.gov.uk/whats-on": "https://example.gov.uk/events",
+    }
+    resolve_calls = []
+    
+    async def fake_resolve_urls(urls):
+        resolve_calls.append(list(urls))
+        return UrlResolutionMapping(
+            mappings={
+                url: UrlResolutionResult(original_url=url, resolved_url=resolves_to.get(url, url), resolution_success=True)
+                for url in urls
+            },
+            total_urls=len(urls),
+            successful_resolutions=len(urls),
+            failed_resolutions=0,
+            processing_time_seconds=0.0
+        )
+    
+    top_urls = [
+        "https://example.gov.uk/news",
+        "https://example.gov.uk/latest-news",
+        "https://example.gov.uk/events",
+        "https://example.gov.uk/consultations",
+        "https://example.gov.uk/planning",
+    ]
+    all_urls = top_urls + [
+        "https://example.gov.uk/whats-on",
+        "https://example.gov.uk/council-meetings",
+        "https://example.gov.uk/jobs",
+    ]
+    
+    original_resolve_urls = url_service_module.resolve_urls
+    url_service_module.resolve_urls = fake_resolve_urls
+    try:
+        service = url_service_module.OnboardingUrlService()
+        unique_urls = asyncio.run(service._validate_unique_resolutions(top_urls, all_urls))
+    finally:
+        url_service_module.resolve_urls = original_resolve_urls
+    
+    assert unique_urls == [
+        "https://example.gov.uk/news",
+        "https://example.gov.uk/events",
+        "https://example.gov.uk/consultations",
+        "https://example.gov.uk/planning",
+        "https://example.gov.uk/council-meetings",
+    ]
+    assert len(resolve_calls) == 2
+    assert "https://example.gov.uk/whats-on" in resolve_calls[1]
+    print("✅ Duplicates are replaced by unique hubs resolved in a single batch")
+    
+    return True
+
+def test_onboarded_site_overlap():
+    """Test that an onboarded site crawls its top URLs while discovery runs."""
+    print("\nTesting onboarded site overlap...")
+    
+    import asyncio
+    import sys
+    from pathlib import Path
+    from app.models.config_models import SiteConfig
+    from app.models.url_models import DetectionMethod, UrlProcessingResult
+    from app.utils.url_utils import create_url_info
+    
+    url_service_module = sys.modules["app.services.url_service"]
+    
+    class FakeConfigService:
+        def site(self, site_id):
+            return SiteConfig(name="Example", url="https://example.com", sitemap_url="https://example.com/sitemap.xml",
+                              onboarded=True, top_urls=["https://example.com/news"])
+        
+        def is_site_onboarded(self, site_id):
+            return True
+    
+    class FakeJsonWriter:
+        def write_processing_summary(self, site_id, summary):
+            return Path("summary.json")
+    
+    class OverlapUrlService(url_service_module.UrlService):
+        def __init__(self):
+            self.json_writer = FakeJsonWriter()
+            self.crawl_started = None
+        
+        async def _get_urls_from_multiple_sources(self, site_config):
+            # finishes only once the top-URL crawl has started alongside it
+            await asyncio.wait_for(self.crawl_started.wait(), timeout=1)
+            url_info = create_url_info("https://example.com/", DetectionMethod.SITEMAP)
+            return UrlProcessingResult(urls=[url_info], total_count=1, processing_time_seconds=0.0, operation_type="url_discovery")
+        
+        async def _get_additional_urls_from_top_urls(self, top_urls):
+            self.crawl_started.set()
+            return [
+                create_url_info("https://example.com/news/story", DetectionMethod.FIRECRAWL_CRAWL),
+                create_url_info("https://example.com/", DetectionMethod.FIRECRAWL_CRAWL),
+            ]
+        
+        async def _save_url_set(self, url_set):
+            return Path("output")
+    
+    async def run():
+        service = OverlapUrlService()
+        service.crawl_started = asyncio.Event()
+        return await service.process_site("example")
+    
+    original_config_service = url_service_module.config_service
+    url_service_module.config_service = FakeConfigService()
+    try:
+        result = asyncio.run(run())
+    finally:
+        url_service_module.config_service = original_config_service
+    
+    assert result["url_set"]["total_count"] == 2
+    print("✅ Discovery and the top-URL crawl run concurrently for onboarded sites")
+    
+    # a crawled URL that discovery also found is merged into one entry
+    homepage = next(url for url in result["url_set"]["urls"] if url["url"] == "https://example.com/")
+    assert set(homepage["detection_methods"]) == {DetectionMethod.SITEMAP, DetectionMethod.FIRECRAWL_CRAWL}
+    print("✅ Discovered and crawled URLs are deduplicated together")
+    
+    return True
+
+def test_shared_client_lifecycle():
+    """Test that shared OpenAI clients are kept per event loop and closed before it ends."""
+    print("\nTesting shared client lifecycle...")
+    
+    import sys
+    from app.clients.openai_client import OpenAIClient
+    from app.utils.event_loop import run
+    
+    openai_client_module = sys.modules["app.clients.openai_client"]
+    created = []
+    
+    class FakeAsyncOpenAI:
+        def __init__(self, api_key=None):
+            self.closed = False
+            created.append(self)
+        
+        async def close(self):
+            self.closed = True
+    
+    class FakeConfigService:
+        get_openai_api_key = "sk-test"
+    
+    async def get_client_twice():
+        return OpenAIClient._get_shared_client(), OpenAIClient._get_shared_client()
+    
+    original_client_class = openai_client_module.AsyncOpenAI
+    original_config_service = openai_client_module.config_service
+    original_clients = OpenAIClient._shared_clients
+    openai_client_module.AsyncOpenAI = FakeAsyncOpenAI
+    openai_client_module.config_service = FakeConfigService()
+    OpenAIClient._shared_clients = {}
+    try:
+        first, again = run(get_client_twice())
+        second, _ = run(get_client_twice())
+    finally:
+        openai_client_module.AsyncOpenAI = original_client_class
+        openai_client_module.config_service = original_config_service
+        OpenAIClient._shared_clients = original_clients
+    
+    assert first is again and first is not second
+    print("✅ One shared client per event loop")
+    
+    assert len(created) == 2 and all(client.closed for client in created)
+    print("✅ Each loop's client is closed before that loop ends")
+    
+    return True
+
 def main():
     """Run all tests."""
     print("=" * 60)
@@ -166,6 +1192,25 @@ def main():
         ("Configuration Service", test_config_service),
         ("Models", test_models),
         ("AI Configuration", test_ai_config),
+        ("Prompt Pre-filter", test_prompt_prefilter),
+        ("Prompt Cache", test_prompt_cache),
+        ("Batch Packing", test_batch_packing),
+        ("Hub Classifier", test_hub_classifier),
+        ("Prompt URL Compression", test_prompt_url_compression),
+        ("Bounded Gather", test_bounded_gather),
+        ("Token Bucket", test_token_bucket),
+        ("Sitemap Parsing", test_sitemap_parsing),
+        ("Sitemap Conditional GET", test_sitemap_conditional_get),
+        ("Sitemap Index Dedup", test_sitemap_index_dedup),
+        ("Firecrawl Rate Limit Detection", test_firecrawl_rate_limit_detection),
+        ("UrlInfo Timestamps", test_url_info_timestamps),
+        ("Config YAML Cache", test_config_yaml_cache),
+        ("Trigger Responses", test_trigger_responses),
+        ("Duplicate Resolutions", test_duplicate_resolutions),
+        ("Top URL Crawl Dedup", test_top_url_crawl_dedup),
+        ("Unique Resolution Replacements", test_unique_resolution_replacements),
+        ("Onboarded Site Overlap", test_onboarded_site_overlap),
+        ("Shared Client Lifecycle", test_shared_client_lifecycle),
     ]
     
     results = {}